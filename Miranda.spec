@@ -8,6 +8,11 @@ hiddenimports += collect_submodules("mediapipe")
 # which is why we need to manually add them.
 # https://stackoverflow.com/questions/52675162/pyinstaller-doesnt-play-well-with-imagetk-and-tkinter
 hiddenimports += ["PIL._tkinter_finder"]
+# the input methods, tracking approaches and output methods are imported by name when they're selected,
+# so PyInstaller can't find them by itself
+hiddenimports += collect_submodules("input_methods")
+hiddenimports += collect_submodules("tracking_approaches")
+hiddenimports += collect_submodules("output_methods")
 
 datas = []
 datas += collect_data_files("pye3d", includes=["refraction_models/*.msgpack"])
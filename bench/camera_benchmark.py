@@ -0,0 +1,140 @@
+"""Benchmarks the detection of the camera based inputs on a video file, as fast as possible.
+
+Run it from the repository root with a recorded eye video for pye3d, or a face video for mediapipe:
+
+    python -m bench.camera_benchmark pye3d eye.mp4
+    python -m bench.camera_benchmark mediapipe face.mp4 --max-frames 500
+
+For every stage of a frame (decode, convert, detect, overlay, copy) the time is measured,
+as well as the overall frames per second and the CPU usage of the process."""
+
+import argparse
+import time
+
+import cv2
+
+from bench.common import install_stubs
+
+install_stubs()
+
+import config  # noqa: E402
+
+STAGES = ["decode", "convert", "detect", "overlay", "copy"]
+
+
+def create_detector(name: str, args):
+    """Returns the stages `convert`, `detect` and `overlay` of the detector, and a function to close it.
+    In a separate process, the conversion is part of the detection."""
+    if name == "pye3d":
+        from input_methods.clients.pye3d_detector import Pye3DDetector as detector_class
+
+        kwargs = dict(
+            focal_length=args.focal_length,
+            resolution=args.resolution,
+            roi_margin=args.roi_margin,
+            roi_min_confidence=config.PUPIL_ROI_MIN_CONFIDENCE,
+        )
+    else:
+        from input_methods.clients.mediapipe_head_pose import MediaPipeHeadPoseEstimator as detector_class
+
+        kwargs = {}
+
+    if args.separate_process:
+        from input_methods.clients.detector_process import DetectorProcess
+
+        detector = DetectorProcess(detector_class, **kwargs)
+        return lambda frame: frame, detector.process, detector_class.draw_overlay, detector.close
+
+    detector = detector_class(**kwargs)
+    return detector.convert, detector.detect, detector_class.draw_overlay, detector.close
+
+
+def run(name: str, args):
+    convert, detect, draw_overlay, close = create_detector(name, args)
+    video_capture = cv2.VideoCapture(args.video)
+    if not video_capture.isOpened():
+        raise SystemExit(f'could not open "{args.video}"')
+    fps = video_capture.get(cv2.CAP_PROP_FPS) or 24.0
+
+    durations = {stage: [] for stage in STAGES}
+    frames = 0
+    detections = 0
+    perf_counter = time.perf_counter
+    started_at = perf_counter()
+    cpu_started_at = time.process_time()
+    try:
+        while args.max_frames is None or frames < args.max_frames:
+            t0 = perf_counter()
+            ret, frame = video_capture.read()
+            if not ret or frame is None:
+                break
+            t1 = perf_counter()
+            converted = convert(frame)
+            t2 = perf_counter()
+            result = detect(converted, frames, fps)
+            t3 = perf_counter()
+            if result is not None and not args.no_overlay:
+                draw_overlay(frame, result)
+            t4 = perf_counter()
+            frame.copy()
+            t5 = perf_counter()
+
+            for stage, duration in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+                durations[stage].append(duration)
+            frames += 1
+            if result is not None:
+                detections += 1
+    finally:
+        video_capture.release()
+        close()
+
+    wall_sec = perf_counter() - started_at
+    cpu_sec = time.process_time() - cpu_started_at
+    if frames == 0:
+        raise SystemExit(f'"{args.video}" contains no frames')
+
+    print(f"{name}: {frames} frames of {args.video}, detected in {detections}")
+    print(f"{frames / wall_sec:.1f} fps, CPU {100 * cpu_sec / wall_sec:.0f}% of one core")
+    print(f"{'stage':<10} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'share':>7}")
+    total = sum(sum(stage_durations) for stage_durations in durations.values())
+    for stage in STAGES:
+        stage_durations = sorted(durations[stage])
+        print(
+            f"{stage:<10} {1000 * sum(stage_durations) / frames:>9.3f} "
+            f"{1000 * stage_durations[frames // 2]:>9.3f} "
+            f"{1000 * stage_durations[min(frames - 1, int(frames * 0.99))]:>9.3f} "
+            f"{100 * sum(stage_durations) / total:>6.1f}%"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the detection of the camera based inputs.")
+    parser.add_argument("detector", choices=["pye3d", "mediapipe"])
+    parser.add_argument("video", help="The video file to run the detection on.")
+    parser.add_argument("--max-frames", type=int, help="Stop after this many frames.")
+    parser.add_argument(
+        "--separate-process",
+        action="store_true",
+        help="Detect in a separate process, as with --detect-in-separate-process.",
+    )
+    parser.add_argument("--no-overlay", action="store_true", help="Don't draw the overlay of the preview.")
+    parser.add_argument("--focal-length", type=float, default=1000.0, help="Focal length of the eye camera (pye3d).")
+    parser.add_argument(
+        "--roi-margin",
+        type=int,
+        default=config.PUPIL_ROI_MARGIN_IN_PX,
+        help="Margin of the region of interest around the pupil in pixels, 0 searches the whole frame (pye3d). "
+        'default="%(default)s"',
+    )
+    parser.add_argument(
+        "--resolution",
+        type=lambda value: tuple(int(v) for v in value.split("x")),
+        default=(640, 480),
+        help="Resolution of the eye camera as WIDTHxHEIGHT (pye3d). default=640x480",
+    )
+    args = parser.parse_args()
+    run(args.detector, args)
+
+
+if __name__ == "__main__":
+    main()
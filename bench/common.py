@@ -0,0 +1,130 @@
+import json
+import sys
+import time
+import tracemalloc
+import types
+from typing import Callable, Iterable, Optional
+
+
+class BenchResult:
+    """The result of one benchmark. Latencies are per call, which is one sample unless `samples_per_call` is set."""
+
+    def __init__(
+        self,
+        name: str,
+        latencies_ns: list[int],
+        total_sec: float,
+        peak_bytes: int,
+        retained_bytes: int,
+        samples_per_call: int = 1,
+    ):
+        self.name = name
+        self.count = len(latencies_ns) * samples_per_call
+        self.samples_per_sec = self.count / total_sec if total_sec > 0 else float("inf")
+        latencies = sorted(latencies_ns)
+        self.p50_us = latencies[len(latencies) // 2] / 1000 if latencies else 0.0
+        self.p99_us = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] / 1000 if latencies else 0.0
+        self.max_us = latencies[-1] / 1000 if latencies else 0.0
+        self.peak_bytes = peak_bytes
+        self.retained_bytes_per_sample = retained_bytes / self.count if self.count else 0.0
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def measure(name: str, func: Callable, inputs: Iterable, warmup: int = 100, samples_per_call: int = 1) -> BenchResult:
+    """Calls `func` with every input. The latency of every call is measured in a first run,
+    the memory allocations with tracemalloc in a second run, since tracing slows down every call."""
+    inputs = list(inputs)
+    for value in inputs[:warmup]:
+        func(value)
+
+    latencies_ns = []
+    perf_counter_ns = time.perf_counter_ns
+    started_at = time.perf_counter()
+    for value in inputs:
+        call_started_at = perf_counter_ns()
+        func(value)
+        latencies_ns.append(perf_counter_ns() - call_started_at)
+    total_sec = time.perf_counter() - started_at
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for value in inputs:
+        func(value)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return BenchResult(name, latencies_ns, total_sec, peak - before, after - before, samples_per_call)
+
+
+def print_results(results: list[BenchResult], json_path: Optional[str] = None):
+    print(
+        f"{'benchmark':<40} {'samples/s':>12} {'p50 µs':>9} {'p99 µs':>9} {'max µs':>9} "
+        f"{'peak KiB':>9} {'B/sample':>9}"
+    )
+    for r in results:
+        print(
+            f"{r.name:<40} {r.samples_per_sec:>12.0f} {r.p50_us:>9.2f} {r.p99_us:>9.2f} {r.max_us:>9.1f} "
+            f"{r.peak_bytes / 1024:>9.1f} {r.retained_bytes_per_sample:>9.1f}"
+        )
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump([r.as_dict() for r in results], f, indent=2)
+
+
+def install_stubs():
+    """Replaces pyautogui with a stub, so the benchmarks run headless and only measure Miranda itself.
+    Has to be called before anything imports pyautogui."""
+    pyautogui = types.ModuleType("pyautogui")
+    pyautogui.FAILSAFE = True
+    pyautogui._position = (0, 0)
+
+    def position():
+        return pyautogui._position
+
+    def moveTo(x, y, _pause=True):
+        pyautogui._position = (int(x), int(y))
+
+    pyautogui.position = position
+    pyautogui.moveTo = moveTo
+    sys.modules["pyautogui"] = pyautogui
+
+
+class StubTTS:
+    def __init__(self, lang: str = "en"):
+        self.spoken = []
+
+    def speak(self, text: str) -> None:
+        self.spoken.append(text)
+
+
+class StubCanvas:
+    """Accepts every Tk canvas call, so canvas-drawing code can run without a display."""
+
+    def __init__(self, width=900, height=400):
+        self._width = width
+        self._height = height
+        self._next_id = 0
+
+    def winfo_rootx(self):
+        return 0
+
+    def winfo_rooty(self):
+        return 0
+
+    def winfo_width(self):
+        return self._width
+
+    def winfo_height(self):
+        return self._height
+
+    def _create(self, *args, **kwargs):
+        self._next_id += 1
+        return self._next_id
+
+    create_rectangle = create_oval = create_text = _create
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
@@ -0,0 +1,222 @@
+"""Benchmarks the input → tracking → output pipeline without a display.
+
+Run it from the repository root:
+
+    python -m bench.pipeline_benchmark
+    python -m bench.pipeline_benchmark --recording session.rec --json results.json
+
+The samples are either synthetic or read from a recording made with `main.py --record`."""
+
+import argparse
+import os
+import random
+import socket
+import time
+
+import numpy as np
+
+from bench.common import StubCanvas, StubTTS, install_stubs, measure, print_results
+
+install_stubs()
+
+import config  # noqa: E402
+from calibration import CalibrationResult  # noqa: E402
+from gaze_sample import GazeSample  # noqa: E402
+from mouse_movement import (MouseMovement, MouseMovementType,  # noqa: E402
+                            get_new_mouse_position, scale_vector_to_screen)
+from output_methods import output_methods  # noqa: E402
+from output_methods import tts_keyboard_output_method  # noqa: E402
+from tracking_approaches.d_pad_tracking_approach import DPadTrackingApproach  # noqa: E402
+from tracking_approaches.gaze_on_screen_tracking_approach import GazeOnScreenTrackingApproach  # noqa: E402
+
+SCREEN_WIDTH = 1920
+SCREEN_HEIGHT = 1080
+# what an input method would deliver when looking at the corners: top left, top right, bottom right, bottom left
+CALIBRATION_VECTORS = [(-0.6, 0.4), (0.6, 0.4), (0.6, -0.4), (-0.6, -0.4)]
+HOMOGRAPHY_BATCH_SIZE = 256
+
+
+def synthetic_samples(count: int, seed: int) -> list[GazeSample]:
+    """A gaze wandering around the calibrated area, with fixations and saccades."""
+    rng = random.Random(seed)
+    x, y = 0.0, 0.0
+    samples = []
+    timestamp = time.monotonic()
+    for sequence in range(count):
+        if rng.random() < 0.02:
+            x, y = rng.uniform(-0.7, 0.7), rng.uniform(-0.5, 0.5)
+        x += rng.gauss(0, 0.005)
+        y += rng.gauss(0, 0.005)
+        timestamp += 1 / 60
+        samples.append(GazeSample((x, y), timestamp, sequence, rng.uniform(0.6, 1.0), "synthetic"))
+    return samples
+
+
+def recorded_samples(path: str, count: int) -> list[GazeSample]:
+    # imported here, since importing the input methods loads every detection library
+    from input_methods.recording import read_recording
+
+    samples = []
+    for sample in read_recording(path):
+        samples.append(sample)
+        if len(samples) >= count:
+            break
+    if not samples:
+        raise SystemExit(f'"{path}" contains no samples')
+    return samples
+
+
+def calibrated(tracking_approach):
+    tracking_approach.calibrate(CalibrationResult(CALIBRATION_VECTORS))
+    return tracking_approach
+
+
+def bench_tracking(samples):
+    results = []
+    for name, tracking_approach in [
+        ("gaze-on-screen", calibrated(GazeOnScreenTrackingApproach())),
+        ("d-pad", calibrated(DPadTrackingApproach())),
+    ]:
+        results.append(measure(f"tracking/{name}", tracking_approach.get_next_mouse_movement_for_sample, samples))
+
+    homography = calibrated(GazeOnScreenTrackingApproach()).homography
+    vectors = np.array([sample.vector for sample in samples], dtype=np.float64)
+    batches = [vectors[i: i + HOMOGRAPHY_BATCH_SIZE] for i in range(0, len(vectors), HOMOGRAPHY_BATCH_SIZE)]
+    batches = [batch for batch in batches if len(batch) == HOMOGRAPHY_BATCH_SIZE]
+    out = np.empty((HOMOGRAPHY_BATCH_SIZE, 2), dtype=np.float64)
+    results.append(
+        measure(
+            f"homography/transform_many[{HOMOGRAPHY_BATCH_SIZE}]",
+            lambda batch: homography.transform_many(batch, out),
+            batches,
+            warmup=2,
+            samples_per_call=HOMOGRAPHY_BATCH_SIZE,
+        )
+    )
+    return results
+
+
+def bench_mouse_position(samples):
+    results = []
+    for name, movement_type in [("to-position", MouseMovementType.TO_POSITION), ("by", MouseMovementType.BY)]:
+        movements = [MouseMovement(movement_type, sample.vector, sample) for sample in samples]
+        last_mouse_position = [SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2]
+
+        def move(mouse_movement):
+            nonlocal last_mouse_position
+            last_mouse_position = get_new_mouse_position(
+                mouse_movement, last_mouse_position, 1 / 60, SCREEN_WIDTH, SCREEN_HEIGHT
+            )
+
+        results.append(measure(f"mouse_position/{name}", move, movements))
+    return results
+
+
+def create_output_method(key: str):
+    """Creates and starts an OutputMethod, set up so it does the work it would do with a consumer attached.
+    Returns the OutputMethod and a function to clean up after the benchmark."""
+    if key == "tts-keyboard":
+        # the keyboard draws onto a canvas instead of a window, and always has the focus
+        tts_keyboard_output_method.TTS = StubTTS
+        output_method = output_methods[key].clazz(None)
+        output_method.canvas = StubCanvas(
+            tts_keyboard_output_method.WINDOW_WIDTH, tts_keyboard_output_method.WINDOW_HEIGHT
+        )
+        output_method._has_focus = lambda: True
+        output_method._build_targets()
+        output_method._on_resize()
+        return output_method, lambda: None
+
+    if key == "shared-memory":
+        output_method = output_methods[key].clazz(None, name=f"{config.SHARED_MEMORY_NAME}_bench_{os.getpid()}")
+        output_method.start()
+        return output_method, output_method.stop
+
+    if key == "udp-fan-out":
+        output_method = output_methods[key].clazz(None, port=0)
+        output_method.start()
+        subscriber = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        subscriber.bind(("127.0.0.1", 0))
+        subscriber.settimeout(1)
+        subscriber.sendto(b"SUBSCRIBE binary", output_method.sock.getsockname())
+        subscriber.recvfrom(64)
+
+        def cleanup():
+            output_method.stop()
+            subscriber.close()
+
+        return output_method, cleanup
+
+    output_method = output_methods[key].clazz(None)
+    output_method.start()
+    return output_method, output_method.stop
+
+
+def bench_output_methods(samples, keys):
+    results = []
+    screen_samples = [
+        sample.with_vector(scale_vector_to_screen(sample.vector, SCREEN_WIDTH, SCREEN_HEIGHT)) for sample in samples
+    ]
+    for key in keys:
+        output_method, cleanup = create_output_method(key)
+        try:
+            results.append(measure(f"output/{key}", output_method.push_sample, screen_samples))
+        finally:
+            cleanup()
+    return results
+
+
+def bench_pipeline(samples, key):
+    """Everything the loop in main.py does for one sample, from tracking to the OutputMethod."""
+    tracking_approach = calibrated(GazeOnScreenTrackingApproach())
+    output_method, cleanup = create_output_method(key)
+    last_mouse_position = [SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2]
+
+    def process(sample):
+        nonlocal last_mouse_position
+        mouse_movement = tracking_approach.get_next_mouse_movement_for_sample(sample)
+        last_mouse_position = get_new_mouse_position(
+            mouse_movement, last_mouse_position, 1 / 60, SCREEN_WIDTH, SCREEN_HEIGHT
+        )
+        output_method.push_sample(sample.with_vector(tuple(last_mouse_position)))
+
+    try:
+        return [measure(f"pipeline/gaze-on-screen→{key}", process, samples)]
+    finally:
+        cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the Miranda pipeline without a display.")
+    parser.add_argument("--samples", type=int, default=10_000, help="Number of samples per benchmark.")
+    parser.add_argument("--recording", help="Use the samples of a recording instead of synthetic ones.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic samples.")
+    parser.add_argument(
+        "--outputs",
+        default=",".join(output_methods),
+        help=f"Comma separated OutputMethods to benchmark. Default: {','.join(output_methods)}",
+    )
+    parser.add_argument("--pipeline-output", default="udp", help="OutputMethod of the end-to-end benchmark.")
+    parser.add_argument("--json", help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    if args.recording:
+        samples = recorded_samples(args.recording, args.samples)
+    else:
+        samples = synthetic_samples(args.samples, args.seed)
+    keys = [key for key in args.outputs.split(",") if key]
+    unknown = [key for key in keys + [args.pipeline_output] if key not in output_methods]
+    if unknown:
+        parser.error(f"unknown output methods: {', '.join(unknown)}")
+
+    results = []
+    results += bench_tracking(samples)
+    results += bench_mouse_position(samples)
+    results += bench_output_methods(samples, keys)
+    results += bench_pipeline(samples, args.pipeline_output)
+    print(f"{len(samples)} samples{' from ' + args.recording if args.recording else ''}")
+    print_results(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
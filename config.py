@@ -35,8 +35,44 @@ os.makedirs(CONFIG_DIR, exist_ok=True)
 
 
 # in application
-MOUSE_SPEED_IN_PX = 20
+MOUSE_SPEED_IN_PX_PER_SEC = 200
 LOOP_SLEEP_IN_MILLISEC = 100
+INPUT_POLL_INTERVAL_IN_MILLISEC = 10
+METRICS_INTERVAL_IN_SEC = 5
+UDP_BINARY_BATCH_SIZE = 1
+UDP_BATCH_MAX_DELAY_IN_MILLISEC = 50
+UDP_FAN_OUT_PORT = 9998
+UDP_SUBSCRIBER_BUFFER_SIZE = 64
+UDP_SUBSCRIPTION_TIMEOUT_IN_SEC = 10
+SHARED_MEMORY_NAME = "miranda_gaze"
+SHARED_MEMORY_CAPACITY = 1024
+PREVIEW_INTERVAL_IN_MILLISEC = 66  # how often the camera previews are redrawn
+FACE_LANDMARK_OVERLAY_STEP = 1  # draw every n-th face landmark in the head tracking preview, 0 draws none
+# defaults for new cameras, afterwards the settings are stored per camera in CONFIG_DIR/camera_settings.json
+CAMERA_FPS = None  # None keeps the camera's default
+CAMERA_FOURCC = "MJPG"
+CAMERA_BUFFER_SIZE = 1
+CAMERA_OPEN_TIMEOUT_IN_SEC = 3  # how long the camera discovery waits for the selected camera to be opened
+PUPIL_ROI_MARGIN_IN_PX = 50  # search the pupil only this far around its last position, 0 searches the whole frame
+PUPIL_ROI_MIN_CONFIDENCE = 0.6  # below, the pupil counts as lost and the whole frame is searched
+EYETRACKVR_EYE = "left"  # "left", "right" or "both" averaged, if EyeTrackVR sends the eyes separately
+# the OSC address the gaze is taken from: "/tracking/eye/LeftRightVec", "/tracking/eye/LeftRightPitchYaw",
+# "/tracking/eye/CenterVec", "/tracking/eye/CenterPitchYaw", or "/avatar/parameters" for LeftEyeX, RightEyeX and EyesY
+EYETRACKVR_OSC_ADDRESS = "/tracking/eye/LeftRightVec"
+ORLOSKY_UDP_PORT = None  # receive the gaze vectors of the 3DEyeTracker via UDP instead of from gaze_vector.txt
+ORLOSKY_POLL_INTERVAL_IN_MILLISEC = 10  # how often gaze_vector.txt is checked for changes without inotify
+ORLOSKY_RETRY_DELAY_IN_SEC = 1  # how long to wait before reading the gaze vectors again after an error
+PUPIL_EYES = (0,)  # the eyes to use from Pupil Capture, (0, 1) averages both
+PUPIL_FLIPPED_EYES = ()  # eyes whose camera is mounted upside down, so both eyes move the same way when averaged
+PUPIL_USE_GAZE = False  # use the gaze of Pupil Capture instead of the eyes' rotation, needs a calibration in Pupil
+PUPIL_MIN_CONFIDENCE = 0.6  # data from Pupil Capture with a lower confidence is dropped
+PUPIL_RECEIVE_HIGH_WATER_MARK = 100  # messages queued at most while Pupil Capture sends faster than they're read
+PUPIL_RECONNECT_MIN_DELAY_IN_SEC = 0.5  # doubled after every failed attempt to reconnect to Pupil Capture
+PUPIL_RECONNECT_MAX_DELAY_IN_SEC = 5
+DETECT_IN_SEPARATE_PROCESS = False  # run the detection of the camera based inputs in their own process
+VIDEO_SOURCE = None  # camera index or path of a video file for the camera based inputs, None for the first camera
+REPLAY_FILE = None
+REPLAY_SPEED = 1.0  # 0 replays as fast as possible
 SHOW_FINAL_CALIBRATION_TEXT_FOR_SEC = 30
 SHOW_PREP_CALIBRATION_TEXT_FOR_SEC = 10
 WAIT_TIME_BEFORE_COLLECTING_VECTORS_IN_SEC = 3
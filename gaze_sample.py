@@ -0,0 +1,40 @@
+from typing import Optional
+
+from misc import Vector
+
+
+class GazeSample:
+    """A vector together with some information about its capture.
+    It is created by an InputMethod and travels through the TrackingApproach to the OutputMethod.
+
+    The timestamp is the `time.monotonic()` time in seconds when the vector was captured,
+    e.g. when the camera frame was read or the network packet was received.
+    The sequence is counted up by the source for every captured vector, so gaps in it
+    mean that vectors were dropped on the way. The confidence ranges from 0.0 to 1.0,
+    and is None if the source doesn't provide one."""
+
+    __slots__ = ("vector", "timestamp", "sequence", "confidence", "source")
+
+    def __init__(
+        self,
+        vector: Vector,
+        timestamp: float,
+        sequence: int,
+        confidence: Optional[float] = None,
+        source: Optional[str] = None,
+    ):
+        self.vector = vector
+        self.timestamp = timestamp
+        self.sequence = sequence
+        self.confidence = confidence
+        self.source = source
+
+    def with_vector(self, vector: Vector) -> "GazeSample":
+        """Returns a copy of this sample with another vector, e.g. the transformed screen position."""
+        return GazeSample(vector, self.timestamp, self.sequence, self.confidence, self.source)
+
+    def __repr__(self):
+        return (
+            f"GazeSample(vector={self.vector}, timestamp={self.timestamp}, sequence={self.sequence}, "
+            f"confidence={self.confidence}, source={self.source})"
+        )
@@ -1,18 +1,14 @@
-from input_methods.mediapipe_input_method import MediaPipeInputMethod
-# Keep this import on top.
-# There are some DLL loading issues with Mediapipe on Windows when loaded later,
-# especially when together with opencv.
-# See:
-# https://github.com/google-ai-edge/mediapipe/issues/1905
+import sys
 
-from input_methods.mouse_input_method import MouseInputMethod
-from input_methods.opentrack_input_method import OpentrackInputMethod
-from input_methods.orlosky_input_method import OrloskyInputMethod
-from input_methods.pupil_input_method import PupilInputMethod
-from input_methods.pye3d_input_method import Pye3dInputMethod
 from guis.tkinter.main_menu_window import MainMenuOption
-from misc import resource_path
-from input_methods.eyetrackvr_input_method import EyeTrackVRInputMethod
+from misc import LazyClass, resource_path
+
+# The input methods are only imported when they're selected, since some of them take long to import.
+# There are some DLL loading issues with Mediapipe on Windows when loaded after opencv,
+# so on Windows it's imported before any input method that uses opencv.
+# See:
+# https://github.com/google-ai-edge/mediapipe/issues/1905
+OPENCV_PRELOAD = ("mediapipe",) if sys.platform == "win32" else ()
 
 input_methods: dict[MainMenuOption] = {
     "mouse": MainMenuOption(
@@ -20,7 +16,7 @@ input_methods: dict[MainMenuOption] = {
         title="Mouse Position",
         description="The mouse position as input. Great for testing.",
         icon=resource_path("assets/input_method_mouse.png"),
-        clazz=MouseInputMethod,
+        clazz=LazyClass("input_methods.mouse_input_method:MouseInputMethod"),
     ),
     "eye-tracking-glasses": MainMenuOption(
         key="eye-tracking-glasses",
@@ -28,14 +24,14 @@ input_methods: dict[MainMenuOption] = {
         description="Eye-Tracking using \"Eye-Tracking glasses\"\n" +
                     "with an infrared camera in front of the eye.",
         icon=resource_path("assets/input_method_eye-tracking-glasses.png"),
-        clazz=Pye3dInputMethod,
+        clazz=LazyClass("input_methods.pye3d_input_method:Pye3dInputMethod", preload=OPENCV_PRELOAD),
     ),
     "webcam-head-tracking": MainMenuOption(
         key="webcam-head-tracking",
         title="Webcam Head-Tracking",
         description="Head-Tracking with just using a Webcam.",
         icon=resource_path("assets/input_method_webcam-head-tracking.png"),
-        clazz=MediaPipeInputMethod,
+        clazz=LazyClass("input_methods.mediapipe_input_method:MediaPipeInputMethod", preload=OPENCV_PRELOAD),
     ),
     "opentrack": MainMenuOption(
         key="opentrack",
@@ -43,7 +39,7 @@ input_methods: dict[MainMenuOption] = {
         description="The rotation of your head with OpenTrack.\n" +
                     "**Requires an external application to work.**",
         icon=resource_path("assets/input_method_opentrack.png"),
-        clazz=OpentrackInputMethod,
+        clazz=LazyClass("input_methods.opentrack_input_method:OpentrackInputMethod"),
     ),
     "pupil": MainMenuOption(
         key="pupil",
@@ -51,7 +47,7 @@ input_methods: dict[MainMenuOption] = {
         description="Pupil Lab's 3d-eye detection.\n" +
                     "**Requires an external application to work.**",
         icon=resource_path("assets/input_method_pupil.png"),
-        clazz=PupilInputMethod,
+        clazz=LazyClass("input_methods.pupil_input_method:PupilInputMethod"),
     ),
     "eyetrackvr": MainMenuOption(
         key="eyetrackvr",
@@ -59,7 +55,7 @@ input_methods: dict[MainMenuOption] = {
         description="Eye tracking with EyeTrackVR.\n" +
                     "**Requires an external application to work.**",
         icon=resource_path("assets/input_method_eyetrackvr.png"),
-        clazz=EyeTrackVRInputMethod,
+        clazz=LazyClass("input_methods.eyetrackvr_input_method:EyeTrackVRInputMethod"),
     ),
     "orlosky": MainMenuOption(
         key="orlosky",
@@ -67,6 +63,14 @@ input_methods: dict[MainMenuOption] = {
         description="The 3DEyeTracker from Jason Orlosky.\n" +
                     "**Requires an external application to work.**",
         icon=resource_path("assets/input_method_orlosky.png"),
-        clazz=OrloskyInputMethod,
+        clazz=LazyClass("input_methods.orlosky_input_method:OrloskyInputMethod"),
+    ),
+    "replay": MainMenuOption(
+        key="replay",
+        title="Replay",
+        description="Replays a recording made with --record.\n" +
+                    "Great for reproducing a session.",
+        icon=resource_path("assets/icon.png"),
+        clazz=LazyClass("input_methods.replay_input_method:ReplayInputMethod"),
     ),
 }
@@ -0,0 +1,102 @@
+import glob
+import json
+import os
+import re
+import sys
+import threading
+from typing import Callable, Optional
+
+import cv2
+
+import config
+
+import logging
+
+last_cameras_file = os.path.join(config.CONFIG_DIR, "last_cameras.json")
+
+logger = logging.getLogger(__name__)
+
+# probing cameras with OpenCV is slow, so each index is only probed once per run
+_probed_cameras: dict[int, bool] = {}
+_probe_lock = threading.Lock()
+
+
+def list_cameras(max_cams=10, get_open_camera: Optional[Callable[[], Optional[int]]] = None) -> list[int]:
+    """The indices of the available cameras.
+    On Linux, the capture devices in /dev are listed without opening them, elsewhere the
+    first `max_cams` indices are probed with OpenCV once and the result is reused afterwards.
+
+    Elsewhere, the camera returned by `get_open_camera` is listed without probing it: it's in use,
+    and on Windows a camera usually can't be opened a second time. It's only returned while it's
+    actually open, so a camera that was unplugged is probed like any other."""
+    if sys.platform.startswith("linux"):
+        return _list_video4linux_cameras()
+
+    open_camera = get_open_camera() if get_open_camera is not None else None
+    with _probe_lock:
+        for i in range(max_cams):
+            if i != open_camera and i not in _probed_cameras:
+                cap = cv2.VideoCapture(i)
+                _probed_cameras[i] = cap.isOpened()
+                cap.release()
+        cameras = [i for i in range(max_cams) if _probed_cameras.get(i)]
+    if open_camera is not None and open_camera not in cameras:
+        cameras.append(open_camera)
+    return sorted(cameras)
+
+
+def _list_video4linux_cameras() -> list[int]:
+    cameras = []
+    for device in glob.glob("/dev/video*"):
+        match = re.fullmatch(r"/dev/video(\d+)", device)
+        if match is None:
+            continue
+        index = int(match.group(1))
+        # a camera can have more than one device, e.g. for metadata; the one with index 0 captures
+        try:
+            with open(f"/sys/class/video4linux/video{index}/index") as f:
+                if f.read().strip() != "0":
+                    continue
+        except OSError:
+            pass
+        cameras.append(index)
+    return sorted(cameras)
+
+
+class CameraDiscovery:
+    """Lists the cameras on a background thread, so opening a client doesn't block the GUI.
+    `result` is None until the cameras are listed, see `list_cameras` for `get_open_camera`."""
+
+    def __init__(self, max_cams=10, get_open_camera: Optional[Callable[[], Optional[int]]] = None):
+        self.result: Optional[list[int]] = None
+        threading.Thread(target=self._discover, args=(max_cams, get_open_camera), daemon=True).start()
+
+    def _discover(self, max_cams, get_open_camera):
+        try:
+            self.result = list_cameras(max_cams, get_open_camera)
+        except Exception:
+            logger.exception("could not list the cameras")
+            self.result = []
+        logger.debug(f"found cameras: {self.result}")
+
+
+def load_last_camera(client_name: str) -> Optional[int]:
+    try:
+        with open(last_cameras_file, "r") as f:
+            return json.load(f).get(client_name)
+    except (OSError, ValueError):
+        return None
+
+
+def save_last_camera(client_name: str, index: int):
+    try:
+        with open(last_cameras_file, "r") as f:
+            last_cameras = json.load(f)
+    except (OSError, ValueError):
+        last_cameras = {}
+    last_cameras[client_name] = index
+    try:
+        with open(last_cameras_file, "w") as f:
+            json.dump(last_cameras, f, indent=2)
+    except OSError:
+        logger.exception(f'could not write "{last_cameras_file}"')
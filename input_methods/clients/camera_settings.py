@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+from typing import Optional
+
+import cv2
+
+import config
+
+import logging
+
+settings_file = os.path.join(config.CONFIG_DIR, "camera_settings.json")
+
+logger = logging.getLogger(__name__)
+
+
+class CameraSettings:
+    """How a camera shall capture. A setting of None keeps the driver's default.
+
+    The settings are stored per device in `camera_settings.json` in the config directory,
+    and can be edited there, e.g. `{"0: HD USB Camera": {"width": 640, "height": 480, "fps": 120,
+    "fourcc": "MJPG", "buffer_size": 1}}`."""
+
+    def __init__(self, width=None, height=None, fps=None, fourcc=None, buffer_size=None):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "CameraSettings":
+        return cls(**{key: values.get(key) for key in ("width", "height", "fps", "fourcc", "buffer_size")})
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+    def __repr__(self):
+        return f"{self.width}x{self.height}@{self.fps} {self.fourcc} buffer_size={self.buffer_size}"
+
+
+def get_default_settings(resolution=None) -> CameraSettings:
+    return CameraSettings(
+        width=resolution[0] if resolution else None,
+        height=resolution[1] if resolution else None,
+        fps=config.CAMERA_FPS,
+        fourcc=config.CAMERA_FOURCC,
+        buffer_size=config.CAMERA_BUFFER_SIZE,
+    )
+
+
+def get_camera_name(index: int) -> Optional[str]:
+    """The name the driver gives the camera, only known on Linux."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        with open(f"/sys/class/video4linux/video{index}/name") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def get_device_key(index: int) -> str:
+    """Identifies a camera. The name is part of it, so the settings don't apply to another camera
+    that gets the same index later on."""
+    name = get_camera_name(index)
+    return f"{index}: {name}" if name else str(index)
+
+
+def _load_all() -> dict:
+    try:
+        with open(settings_file, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError):
+        logger.exception(f'could not read "{settings_file}"')
+        return {}
+
+
+def load_settings(device_key: str, default: CameraSettings) -> CameraSettings:
+    """The stored settings of a device. If there are none, the default is stored and returned,
+    so it can be edited in the file."""
+    all_settings = _load_all()
+    if device_key in all_settings:
+        return CameraSettings.from_dict(all_settings[device_key])
+    save_settings(device_key, default)
+    return default
+
+
+def save_settings(device_key: str, settings: CameraSettings):
+    all_settings = _load_all()
+    all_settings[device_key] = settings.to_dict()
+    try:
+        with open(settings_file, "w") as f:
+            json.dump(all_settings, f, indent=2)
+    except OSError:
+        logger.exception(f'could not write "{settings_file}"')
+
+
+def apply_settings(video_capture, settings: CameraSettings) -> CameraSettings:
+    """Requests the settings from the driver, and returns the ones it actually uses.
+    The pixel format has to come first, since it limits the possible resolutions and frame rates."""
+    if settings.fourcc:
+        video_capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*settings.fourcc))
+    if settings.width and settings.height:
+        video_capture.set(cv2.CAP_PROP_FRAME_WIDTH, settings.width)
+        video_capture.set(cv2.CAP_PROP_FRAME_HEIGHT, settings.height)
+    if settings.fps:
+        video_capture.set(cv2.CAP_PROP_FPS, settings.fps)
+    if settings.buffer_size:
+        video_capture.set(cv2.CAP_PROP_BUFFERSIZE, settings.buffer_size)
+
+    fourcc = int(video_capture.get(cv2.CAP_PROP_FOURCC))
+    return CameraSettings(
+        width=int(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        height=int(video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        fps=video_capture.get(cv2.CAP_PROP_FPS),
+        fourcc="".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)) if fourcc else None,
+        buffer_size=int(video_capture.get(cv2.CAP_PROP_BUFFERSIZE)) or None,
+    )
@@ -0,0 +1,107 @@
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+from output_methods.shared_memory_ring_buffer import attach_shared_memory
+
+import logging
+
+
+class DetectorProcess:
+    """Runs a detector (e.g. a Pye3DDetector) in a separate process, so its Python parts don't compete
+    for the GIL with the GUI and the main loop. Has the same `process`, `reset` and `close` as the detector.
+
+    The frames are passed through shared memory and the results come back through a pipe.
+    Only one frame is processed at a time, `process` blocks until its result is back."""
+
+    def __init__(self, detector_class, **kwargs):
+        self.logger = logging.getLogger(f"{self.__class__.__name__}({detector_class.__name__})")
+        context = multiprocessing.get_context("spawn")
+        self._connection, child_connection = context.Pipe()
+        self._process = context.Process(
+            target=_run_detector,
+            args=(child_connection, detector_class, kwargs),
+            name=f"{detector_class.__name__}Process",
+            daemon=True,
+        )
+        self._process.start()
+        child_connection.close()
+
+        self._lock = threading.Lock()
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._reset_requested = False
+        self.logger.info(f"started process {self._process.pid}")
+
+    def reset(self):
+        # done by the detector process right before the next frame
+        self._reset_requested = True
+
+    def process(self, frame: np.ndarray, frame_number=None, fps=None):
+        with self._lock:
+            if self._shm is None or self._shm.size < frame.nbytes:
+                self._replace_shared_memory(frame.nbytes)
+            np.ndarray(frame.shape, frame.dtype, buffer=self._shm.buf)[...] = frame
+
+            reset, self._reset_requested = self._reset_requested, False
+            self._connection.send((self._shm.name, frame.shape, frame.dtype.str, frame_number, fps, reset))
+            result = self._connection.recv()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def close(self):
+        with self._lock:
+            try:
+                self._connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self._process.join(timeout=2)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._connection.close()
+            self._replace_shared_memory(None)
+        self.logger.info("stopped")
+
+    def _replace_shared_memory(self, size: Optional[int]):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+        if size is not None:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+
+
+def _run_detector(connection, detector_class, kwargs):
+    detector = detector_class(**kwargs)
+    shm = None
+    try:
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            shm_name, shape, dtype, frame_number, fps, reset = message
+            if shm is None or shm.name != shm_name:
+                if shm is not None:
+                    shm.close()
+                # the memory is owned and unlinked by the DetectorProcess
+                shm = attach_shared_memory(shm_name)
+            frame = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+
+            try:
+                if reset:
+                    detector.reset()
+                result = detector.process(frame, frame_number, fps)
+            except Exception as e:
+                result = e
+            del frame
+            connection.send(result)
+    except (EOFError, OSError):
+        # the parent process is gone
+        pass
+    finally:
+        detector.close()
+        if shm is not None:
+            shm.close()
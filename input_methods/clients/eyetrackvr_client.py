@@ -4,20 +4,66 @@ import time
 from pythonosc.dispatcher import Dispatcher
 from pythonosc.osc_server import BlockingOSCUDPServer
 
+from metrics import metrics
+from misc import DataSignal
+
+# the parameters EyeTrackVR sends for each eye separately, received with the address "/avatar/parameters"
+SPLIT_PARAMETERS = {
+    "/avatar/parameters/LeftEyeX": "left_x",
+    "/avatar/parameters/RightEyeX": "right_x",
+    "/avatar/parameters/EyesY": "y",
+}
+
 
 class EyeTrackVRClient:
-    def __init__(self, ip="127.0.0.1", port=9000, timeout=0.3):
+    """Receives the gaze from EyeTrackVR via OSC.
+
+    The newest gaze is kept as one tuple of (x, y, capture timestamp, sequence), which is replaced as a whole,
+    so x and y are always read together. `eye` selects the "left" or "right" eye, or the average of "both",
+    from the OSC messages that contain both eyes.
+
+    The addresses give the gaze in different units, so only the one given by `address` is used.
+    With "/avatar/parameters", the x of each eye and the y of both eyes arrive in separate messages
+    (see SPLIT_PARAMETERS). They're collected until all the values of the `eye` are there, and only then
+    the gaze is replaced, so an x is never paired with the y of another frame."""
+
+    def __init__(self, ip="127.0.0.1", port=9000, timeout=0.3, eye="left", address="/tracking/eye/LeftRightVec"):
+        assert eye in ("left", "right", "both")
         self.ip = ip
         self.port = port
         self.timeout = timeout
+        self.eye = eye
+        self.address = address
 
+        # VRChat's eye tracking parameters, which EyeTrackVR sends
+        handlers = {
+            "/tracking/eye/LeftRightVec": self._on_left_right_vec,
+            "/tracking/eye/LeftRightPitchYaw": self._on_left_right_pitch_yaw,
+            "/tracking/eye/CenterVec": self._on_center_vec,
+            "/tracking/eye/CenterPitchYaw": self._on_center_pitch_yaw,
+        }
         dispatcher = Dispatcher()
-        dispatcher.map("/tracking/eye/LeftRightVec", lambda addr, *args: self._update_data(args[0], args[1]))
+        if address == "/avatar/parameters":
+            for parameter_address in SPLIT_PARAMETERS:
+                dispatcher.map(parameter_address, self._on_split_parameter)
+        elif address in handlers:
+            dispatcher.map(address, handlers[address])
+        else:
+            raise ValueError(f'unknown EyeTrackVR address "{address}"')
         self.osc_server = BlockingOSCUDPServer((self.ip, self.port), dispatcher)
 
-        self.last_x = None
-        self.last_y = None
-        self._last_update_time = None
+        self._needed_parameters = {
+            "left": {"left_x", "y"},
+            "right": {"right_x", "y"},
+            "both": {"left_x", "right_x", "y"},
+        }[eye]
+        self._pending_parameters = {}
+        self._latest = None
+        self.data_signal = DataSignal()
+        self._sequence = 0
+        self._consumed_sequence = 0
+        self.received = 0
+        self.consumed = 0
 
     def start(self):
         self.thread = threading.Thread(target=self._serve)
@@ -30,21 +76,76 @@ class EyeTrackVRClient:
             self.thread.join(timeout=1)
 
     def get_last_data(self):
-        if self._last_update_time is None:
+        latest = self._latest
+        if latest is None or time.monotonic() - latest[2] > self.timeout:
             return None
+        return latest[0], latest[1]
 
-        if time.time() - self._last_update_time > self.timeout:
-            self.last_x = None
-            self.last_y = None
-            self._last_update_time = None
+    def get_last_sample(self):
+        latest = self._latest
+        if latest is None or time.monotonic() - latest[2] > self.timeout:
             return None
 
-        return (self.last_x, self.last_y)
+        x, y, capture_timestamp, sequence = latest
+        if sequence != self._consumed_sequence:
+            self._consumed_sequence = sequence
+            self.consumed += 1
+            metrics.increment("eyetrackvr.consumed")
+        return {
+            "x": x,
+            "y": y,
+            "capture_timestamp": capture_timestamp,
+            "sequence": sequence,
+        }
+
+    def _on_left_right_vec(self, _address, *args):
+        # the direction of the left eye (x, y, z), and of the right eye, if sent
+        if len(args) >= 6:
+            self._update_eyes(args[0], args[1], args[3], args[4])
+        else:
+            self._update_eyes(args[0], args[1], args[0], args[1])
+
+    def _on_left_right_pitch_yaw(self, _address, left_pitch, left_yaw, right_pitch, right_yaw, *_):
+        self._update_eyes(left_yaw, left_pitch, right_yaw, right_pitch)
+
+    def _on_center_vec(self, _address, x, y, *_):
+        self._update_data(x, y)
+
+    def _on_center_pitch_yaw(self, _address, pitch, yaw, *_):
+        self._update_data(yaw, pitch)
+
+    def _on_split_parameter(self, address, value, *_):
+        name = SPLIT_PARAMETERS[address]
+        if name not in self._needed_parameters:
+            return
+        if name in self._pending_parameters:
+            # the next frame started before the last one was complete, its values are dropped
+            self._pending_parameters = {}
+        self._pending_parameters[name] = value
+        if len(self._pending_parameters) < len(self._needed_parameters):
+            return
+
+        parameters, self._pending_parameters = self._pending_parameters, {}
+        y = parameters["y"]
+        left_x = parameters.get("left_x", parameters.get("right_x"))
+        right_x = parameters.get("right_x", left_x)
+        self._update_eyes(left_x, y, right_x, y)
+
+    def _update_eyes(self, left_x: float, left_y: float, right_x: float, right_y: float):
+        if self.eye == "left":
+            self._update_data(left_x, left_y)
+        elif self.eye == "right":
+            self._update_data(right_x, right_y)
+        else:
+            self._update_data((left_x + right_x) / 2, (left_y + right_y) / 2)
 
     def _update_data(self, new_x: float, new_y: float):
-        self.last_x = new_x
-        self.last_y = new_y
-        self._last_update_time = time.time()
+        # only called by the server thread
+        self.received += 1
+        metrics.increment("eyetrackvr.received")
+        self._sequence += 1
+        self._latest = (new_x, new_y, time.monotonic(), self._sequence)
+        self.data_signal.notify()
 
     def _serve(self):
         self.osc_server.serve_forever(self.timeout)
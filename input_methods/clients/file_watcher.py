@@ -0,0 +1,103 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Optional
+
+import logging
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, length of the name
+
+
+class FileWatcher:
+    """Waits for a file to change, so it only has to be read when it did.
+
+    On Linux, the kernel tells about changes via inotify. Elsewhere, or if inotify isn't available,
+    the modification time and size of the file are checked every `poll_interval_in_sec`.
+    The directory is watched rather than the file, so the file may also be created or replaced later on."""
+
+    def __init__(self, path: str, poll_interval_in_sec=0.01):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = path
+        self.poll_interval_in_sec = poll_interval_in_sec
+        self._name = os.fsencode(os.path.basename(path))
+        self._last_stat = self._stat()
+        self._fd = self._init_inotify() if sys.platform.startswith("linux") else None
+        if self._fd is None:
+            self.logger.info(f'polling "{path}" for changes')
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def wait(self, timeout_in_sec: float) -> bool:
+        """Blocks until the file changed, or the timeout is hit. Returns True if it changed."""
+        if self._fd is not None:
+            return self._wait_for_inotify(timeout_in_sec)
+        return self._wait_for_stat(timeout_in_sec)
+
+    def _init_inotify(self) -> Optional[int]:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1")
+            directory = os.path.dirname(os.path.abspath(self.path))
+            mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+            if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+                error = ctypes.get_errno()
+                os.close(fd)
+                raise OSError(error, f'inotify_add_watch "{directory}"')
+            return fd
+        except (OSError, AttributeError):
+            self.logger.warning("inotify isn't available", exc_info=True)
+            return None
+
+    def _wait_for_inotify(self, timeout_in_sec: float) -> bool:
+        readable, _, _ = select.select([self._fd], [], [], timeout_in_sec)
+        if not readable:
+            return False
+
+        # all pending events are read at once, other files in the directory are ignored
+        changed = False
+        while True:
+            try:
+                data = os.read(self._fd, 4096)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                _, _, _, name_length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = data[offset:offset + name_length].rstrip(b"\0")
+                offset += name_length
+                changed = changed or name == self._name
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size, stat.st_ino
+        except OSError:
+            return None
+
+    def _wait_for_stat(self, timeout_in_sec: float) -> bool:
+        end_time = time.monotonic() + timeout_in_sec
+        while True:
+            stat = self._stat()
+            if stat != self._last_stat:
+                self._last_stat = stat
+                return stat is not None
+            if time.monotonic() >= end_time:
+                return False
+            time.sleep(self.poll_interval_in_sec)
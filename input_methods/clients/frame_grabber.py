@@ -0,0 +1,186 @@
+import threading
+import time
+from typing import NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+from input_methods.clients.camera_settings import (CameraSettings, apply_settings, get_default_settings,
+                                                   get_device_key, load_settings)
+from metrics import metrics
+
+import logging
+
+
+class Frame(NamedTuple):
+    image: np.ndarray
+    # counts every frame read from the source, so gaps show the frames that were dropped
+    sequence: int
+    # time.monotonic() right after the frame was read
+    captured_at: float
+    frame_number: float
+    fps: float
+
+
+class FrameGrabber:
+    """Reads the frames of a camera or a video file on its own thread and keeps only the newest one.
+
+    A detector takes the newest frame with `wait_for_frame()` as soon as it's free, so reading
+    and detection run in parallel. Frames that were replaced before they were taken are
+    counted in `dropped`. Video files are read with their own frame rate, like a camera.
+
+    Cameras are opened with their stored CameraSettings, or with `default_settings` the first time.
+    `settings` are the ones the camera actually uses."""
+
+    def __init__(self, name: str, default_settings: Optional[CameraSettings] = None, retry_interval_in_sec=0.5):
+        self.logger = logging.getLogger(f"{self.__class__.__name__}({name})")
+        self.name = name
+        self.default_settings = default_settings or get_default_settings()
+        self.settings: Optional[CameraSettings] = None
+        self.retry_interval_in_sec = retry_interval_in_sec
+        self.grabbed = 0
+        self.dropped = 0
+
+        self._condition = threading.Condition()
+        self._frame: Optional[Frame] = None
+        self._frame_taken = True
+        self._requested_source = None
+        self._source_changed = False
+        self._opening = False
+        self._video_capture = None
+        self._open_camera: Optional[int] = None
+        self._is_file = False
+        self._sequence = 0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def set_source(self, source, force=False):
+        """A camera index, the path of a video file or None to read nothing."""
+        with self._condition:
+            if force or self._requested_source != source:
+                self._requested_source = source
+                self._source_changed = True
+
+    def is_open(self) -> bool:
+        return self._video_capture is not None
+
+    def get_open_camera(self, timeout_in_sec: float = 0.0) -> Optional[int]:
+        """The index of the camera that is open, or None if no camera is open, e.g. because it was unplugged.
+        If a new source was requested, waits up to the timeout for the attempt to open it."""
+        with self._condition:
+            self._condition.wait_for(lambda: not (self._source_changed or self._opening), timeout_in_sec)
+            return self._open_camera
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._grab_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._release()
+        self.logger.debug(f"stopped, grabbed {self.grabbed} frames, dropped {self.dropped}")
+
+    def wait_for_frame(self, last_sequence: int, timeout_in_sec: float) -> Optional[Frame]:
+        """Returns the newest frame if it's newer than `last_sequence`, waiting up to the timeout for it.
+        Returns None if there is no newer frame in time."""
+        with self._condition:
+            has_frame = self._condition.wait_for(
+                lambda: not self._running or (self._frame is not None and self._frame.sequence > last_sequence),
+                timeout_in_sec,
+            )
+            if not has_frame or self._frame is None or self._frame.sequence <= last_sequence:
+                return None
+            self._frame_taken = True
+            return self._frame
+
+    def _release(self):
+        if self._video_capture is not None:
+            try:
+                self._video_capture.release()
+            finally:
+                self._video_capture = None
+                self._open_camera = None
+        with self._condition:
+            self._frame = None
+
+    def _open(self, source) -> bool:
+        video_capture = cv2.VideoCapture(source)
+        if not video_capture.isOpened():
+            video_capture.release()
+            return False
+        self._release()
+        self._video_capture = video_capture
+        self._is_file = isinstance(source, str)
+        self._open_camera = None if self._is_file else source
+        if self._is_file:
+            self.settings = None
+            self.logger.info(f"opened {source}")
+        else:
+            device_key = get_device_key(source)
+            requested = load_settings(device_key, self.default_settings)
+            self.settings = apply_settings(video_capture, requested)
+            self.logger.info(f'opened "{device_key}", requested {requested}, got {self.settings}')
+        return True
+
+    def _grab_loop(self):
+        last_retry = 0.0
+        next_frame_due_at = 0.0
+
+        while self._running:
+            with self._condition:
+                changed = self._source_changed
+                source = self._requested_source
+                self._source_changed = False
+                self._opening = changed
+
+            if changed:
+                self._release()
+                if source is not None:
+                    self._open(source)
+                last_retry = time.monotonic()
+                with self._condition:
+                    self._opening = False
+                    self._condition.notify_all()
+
+            if self._video_capture is None:
+                now = time.monotonic()
+                if source is not None and now - last_retry >= self.retry_interval_in_sec:
+                    last_retry = now
+                    self._open(source)
+                if self._video_capture is None:
+                    time.sleep(0.05)
+                continue
+
+            fps = self._video_capture.get(cv2.CAP_PROP_FPS) or 24.0
+            if self._is_file:
+                delay = next_frame_due_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_frame_due_at = max(next_frame_due_at + 1.0 / fps, time.monotonic())
+
+            ret, image = self._video_capture.read()
+            captured_at = time.monotonic()
+            self._sequence += 1
+            if not ret or image is None:
+                # the camera was disconnected, or the video file ended and is started over
+                self._release()
+                last_retry = captured_at
+                continue
+
+            frame = Frame(image, self._sequence, captured_at, self._video_capture.get(cv2.CAP_PROP_POS_FRAMES), fps)
+            with self._condition:
+                if not self._frame_taken:
+                    self.dropped += 1
+                    metrics.increment(f"{self.name}.frames_dropped")
+                self._frame = frame
+                self._frame_taken = False
+                self.grabbed += 1
+                self._condition.notify_all()
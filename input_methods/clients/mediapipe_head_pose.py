@@ -0,0 +1,180 @@
+import math
+from collections import deque
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+COLOR_VIOLET = (134, 42, 161)
+COLOR_YELLOW = (0, 237, 254)
+
+FACE_OUTLINE_INDICES = [
+    10, 338, 297, 332, 284, 251, 389, 356,
+    454, 323, 361, 288, 397, 365, 379, 378,
+    400, 377, 152, 148, 176, 149, 150, 136,
+    172, 58, 132, 93, 234, 127, 162, 21,
+    54, 103, 67, 109
+]
+LANDMARKS = {
+    "left": 234,
+    "right": 454,
+    "top": 10,
+    "bottom": 152,
+    "front": 1,
+}
+LANDMARK_INDICES = np.array(list(LANDMARKS.values()))
+
+# the pixels of a filled circle with a radius of 2, relative to its center
+LANDMARK_DOT_RADIUS = 2
+LANDMARK_DOT_OFFSETS = np.array(
+    [
+        (dy, dx)
+        for dy in range(-LANDMARK_DOT_RADIUS, LANDMARK_DOT_RADIUS + 1)
+        for dx in range(-LANDMARK_DOT_RADIUS, LANDMARK_DOT_RADIUS + 1)
+        if dx * dx + dy * dy <= LANDMARK_DOT_RADIUS * LANDMARK_DOT_RADIUS
+    ]
+)
+
+
+class MediaPipeHeadPoseEstimator:
+    """Estimates the head pose in a frame of a camera with the FaceMesh of MediaPipe.
+    Doesn't depend on Tk, so it can run in benchmarks and other processes as well.
+
+    The stages are separate methods, so they can be timed separately:
+    `convert` the BGR frame, `detect` on the converted frame and `draw_overlay` of a detection."""
+
+    def __init__(self, filter_length=8):
+        self._face_mesh = mp.solutions.face_mesh.FaceMesh(
+            static_image_mode=False,
+            max_num_faces=1,
+            refine_landmarks=True,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5,
+        )
+        self._ray_origins = deque(maxlen=filter_length)
+        self._ray_directions = deque(maxlen=filter_length)
+
+    def reset(self):
+        self._ray_origins.clear()
+        self._ray_directions.clear()
+
+    def close(self):
+        # mediapipe can throw if close() is called twice
+        try:
+            if self._face_mesh is not None:
+                self._face_mesh.close()
+        except ValueError:
+            pass
+        self._face_mesh = None
+
+    @staticmethod
+    def convert(frame):
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    @staticmethod
+    def _landmarks_to_np(landmarks, w, h):
+        """All landmarks of a face as one array of shape (N, 3), in pixels."""
+        points = np.array([(lm.x, lm.y, lm.z) for lm in landmarks], dtype=np.float32)
+        points *= np.array([w, h, w], dtype=np.float32)
+        return points
+
+    def process(self, frame, frame_number=None, fps=None):
+        """`convert` and `detect` in one."""
+        return self.detect(self.convert(frame))
+
+    def detect(self, rgb, frame_number=None, fps=None):
+        """Returns the head pose, or None if no face was found.
+        Besides the pose, it contains the landmarks and the ray of the head direction for the overlay."""
+        h, w, _ = rgb.shape
+        results = self._face_mesh.process(rgb)
+
+        if not results.multi_face_landmarks:
+            return None
+
+        landmarks = self._landmarks_to_np(results.multi_face_landmarks[0].landmark, w, h)
+
+        # key points, copied so the normalizations below don't change the landmarks
+        left, right, top, bottom, front = landmarks[LANDMARK_INDICES]
+
+        right_axis = (right - left)
+        right_axis /= (np.linalg.norm(right_axis) + 1e-8)
+
+        up_axis = (top - bottom)
+        up_axis /= (np.linalg.norm(up_axis) + 1e-8)
+
+        forward_axis = np.cross(right_axis, up_axis)
+        forward_axis /= (np.linalg.norm(forward_axis) + 1e-8)
+        forward_axis = -forward_axis
+
+        center = (left + right + top + bottom + front) / 5.0
+
+        half_depth = 80.0
+
+        self._ray_origins.append(center)
+        self._ray_directions.append(forward_axis)
+
+        avg_origin = np.mean(self._ray_origins, axis=0)
+        avg_direction = np.mean(self._ray_directions, axis=0)
+        avg_direction /= (np.linalg.norm(avg_direction) + 1e-8)
+
+        reference_forward = np.array([0, 0, -1], dtype=np.float32)
+
+        xz_proj = np.array(
+            [avg_direction[0], 0, avg_direction[2]], dtype=np.float32)
+        xz_proj /= (np.linalg.norm(xz_proj) + 1e-8)
+        yaw_rad = math.acos(
+            float(np.clip(np.dot(reference_forward, xz_proj), -1.0, 1.0)))
+        if avg_direction[0] < 0:
+            yaw_rad = -yaw_rad
+
+        yz_proj = np.array(
+            [0, avg_direction[1], avg_direction[2]], dtype=np.float32)
+        yz_proj /= (np.linalg.norm(yz_proj) + 1e-8)
+        pitch_rad = math.acos(
+            float(np.clip(np.dot(reference_forward, yz_proj), -1.0, 1.0)))
+        if avg_direction[1] > 0:
+            pitch_rad = -pitch_rad
+
+        yaw_deg = float(np.degrees(yaw_rad))
+        pitch_deg = float(np.degrees(pitch_rad))
+
+        if yaw_deg < 0:
+            yaw_deg = abs(yaw_deg)
+        elif yaw_deg < 180:
+            yaw_deg = 360 - yaw_deg
+
+        if pitch_deg < 0:
+            pitch_deg = 360 + pitch_deg
+
+        ray_length = 2.5 * half_depth
+        ray_end = avg_origin - avg_direction * ray_length
+
+        return {
+            "center": avg_origin.astype(float).tolist(),
+            "direction": avg_direction.astype(float).tolist(),
+            "yaw_deg": yaw_deg,
+            "pitch_deg": pitch_deg,
+            "raw": {
+                "center": center.astype(float).tolist(),
+                "direction": forward_axis.astype(float).tolist(),
+            },
+            "landmarks": landmarks,
+            "ray": (avg_origin.astype(float).tolist(), ray_end.astype(float).tolist()),
+        }
+
+    @staticmethod
+    def draw_overlay(frame, data, landmark_overlay_step=1):
+        """Draws the landmarks and the head direction of a detection OVER the camera frame.
+        Only every `landmark_overlay_step`-th landmark is drawn, none if 0."""
+        if landmark_overlay_step > 0:
+            h, w = frame.shape[:2]
+            points = data["landmarks"][::landmark_overlay_step, :2].astype(np.intp)
+            points = points[(points[:, 0] >= 0) & (points[:, 0] < w) & (points[:, 1] >= 0) & (points[:, 1] < h)]
+            # all dots at once, pixel by pixel of the dot
+            for dy, dx in LANDMARK_DOT_OFFSETS:
+                ys = np.clip(points[:, 1] + dy, 0, h - 1)
+                xs = np.clip(points[:, 0] + dx, 0, w - 1)
+                frame[ys, xs] = COLOR_VIOLET
+
+        origin, end = data["ray"]
+        cv2.line(frame, (int(origin[0]), int(origin[1])), (int(end[0]), int(end[1])), COLOR_YELLOW, 3)
@@ -1,18 +1,43 @@
 import socket
 import struct
+import threading
+import time
+
+from misc import DataSignal
+
+import logging
+
+MESSAGE_SIZE = 6 * 8  # x, y, z, yaw, pitch, roll as doubles
+RECEIVE_BUFFER_SIZE = 64 * 1024
 
 
 class OpentrackClient:
-    def __init__(self, ip="127.0.0.1", port=4242, socket_timeout=0.1):
+    """Receives the head pose from OpenTrack's "UDP over network" output.
+
+    The poses are received on a thread as soon as they arrive, so there's never a backlog of old poses,
+    and only the newest one is kept, together with the time it was received.
+    A pose older than `timeout` counts as stale, e.g. once OpenTrack was stopped, and isn't returned anymore."""
+
+    def __init__(self, ip="127.0.0.1", port=4242, socket_timeout=0.1, timeout=0.3):
+        """`socket_timeout` is only how often the thread checks whether the client was stopped."""
+        self.logger = logging.getLogger(self.__class__.__name__)
         self.socket = None
         self.last_data = None
         self.ip = ip
         self.port = port
         self.socket_timeout = socket_timeout
+        self.timeout = timeout
+        self.data_signal = DataSignal()
+        self._sequence = 0
+        self._running = False
+        self.thread = None
 
     def update_last_data(self, new_values):
         assert len(new_values) == 6
+        self._sequence += 1
         self.last_data = {
+            "capture_timestamp": time.monotonic(),
+            "sequence": self._sequence,
             "x": new_values[0],
             "y": new_values[1],
             "z": new_values[2],
@@ -20,27 +45,52 @@ class OpentrackClient:
             "pitch": new_values[4],
             "roll": new_values[5],
         }
+        self.data_signal.notify()
 
     def start(self):
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.socket.settimeout(5)
         self.socket.bind((self.ip, self.port))
         self.socket.settimeout(self.socket_timeout)
-        self.buffer_size = 6 * 8  # Size of one message
-        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.buffer_size)
+        # the thread reads the poses right away, the buffer only has to bridge it being delayed for a moment.
+        # The kernel counts the overhead of each datagram against it too, so it holds a few hundred poses, not 64 KiB.
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER_SIZE)
+        self._running = True
+        self.thread = threading.Thread(target=self._receive, daemon=True)
+        self.thread.start()
 
     def stop(self):
+        self._running = False
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join(timeout=1)
         self.socket.close()
 
     def get_last_data(self):
-        try:
-            data, addr = self.socket.recvfrom(self.buffer_size)
-            if len(data) == self.buffer_size:
-                new_values = struct.unpack("6d", data)
-                self.update_last_data(new_values)
-            else:
-                self.last_data = None
-        except Exception:
-            self.last_data = None
-        finally:
-            return self.last_data
+        last_data = self.last_data
+        if last_data is None or time.monotonic() - last_data["capture_timestamp"] > self.timeout:
+            return None
+        return last_data
+
+    def _receive(self):
+        is_stale = False
+        while self._running:
+            try:
+                data, _ = self.socket.recvfrom(1024)
+            except socket.timeout:
+                last_data = self.last_data
+                if not is_stale and last_data is not None:
+                    is_stale = time.monotonic() - last_data["capture_timestamp"] > self.timeout
+                    if is_stale:
+                        self.logger.info(f"no pose from OpenTrack for {self.timeout}s")
+                continue
+            except OSError:
+                if self._running:
+                    self.logger.exception(f"could not receive a pose on {self.ip}:{self.port}")
+                    time.sleep(self.socket_timeout)
+                continue
+
+            if len(data) != MESSAGE_SIZE:
+                self.logger.debug(f"ignored a message of {len(data)} bytes")
+                continue
+            is_stale = False
+            self.update_last_data(struct.unpack("6d", data))
@@ -1,21 +1,41 @@
 import os
+import select
+import socket
+import stat
 import threading
 import time
 import tkinter.filedialog as fd
 from typing import Dict, Optional
 
+import config
+from input_methods.clients.file_watcher import FileWatcher
+from misc import DataSignal
+
+import logging
+
 
 class OrloskyClient:
-    def __init__(self):
+    """Reads the gaze vectors of the 3DEyeTracker.
+
+    By default, the tracker writes them to `3DTracker/gaze_vector.txt`, which is only read when it changed.
+    If that file is a named pipe, the lines are read from it as they're written. Or, with a `udp_port`,
+    the lines are received via UDP on localhost, without going through the filesystem at all."""
+
+    def __init__(self, udp_port: Optional[int] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.udp_port = udp_port
         self._data_lock = threading.Lock()
         self._latest_data: Optional[Dict[str, float]] = None
+        self.data_signal = DataSignal()
+        self._sequence = 0
+        self._last_vector = None
         self._running = False
         self._thread: Optional[threading.Thread] = None
         self._tracker_path: Optional[str] = None
         self._path_cache_file = os.path.join(os.getcwd(), ".orlosky_tracker_path")
 
     def start(self):
-        if not self._select_valid_directory():
+        if self.udp_port is None and not self._select_valid_directory():
             return
         self._running = True
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
@@ -59,19 +79,117 @@ class OrloskyClient:
                 return True
 
     def _run_loop(self):
-        gaze_file = os.path.join(self._tracker_path, "3DTracker", "gaze_vector.txt")
+        if self.udp_port is None:
+            gaze_file = os.path.join(self._tracker_path, "3DTracker", "gaze_vector.txt")
         while self._running:
             try:
-                if os.path.exists(gaze_file):
-                    with open(gaze_file, "r") as f:
-                        line = f.read().strip()
-                        if line:
-                            parts = [float(p) for p in line.split(",")]
-                            if len(parts) >= 6:
-                                x, y, z = parts[3], parts[4], parts[5]
-                                with self._data_lock:
-                                    self._latest_data = {"x": x, "y": y, "z": z}
+                if self.udp_port is not None:
+                    self._receive_from_socket()
+                elif _is_fifo(gaze_file):
+                    self._read_from_pipe(gaze_file)
+                else:
+                    # returns once the file was replaced by a named pipe
+                    self._read_on_change(gaze_file)
             except Exception:
-                pass
-            time.sleep(0.05)
+                if self._running:
+                    self.logger.exception(
+                        f"could not read the gaze vectors, retrying in {config.ORLOSKY_RETRY_DELAY_IN_SEC}s"
+                    )
+                    time.sleep(config.ORLOSKY_RETRY_DELAY_IN_SEC)
+
+    def _read_on_change(self, gaze_file: str):
+        watcher = FileWatcher(gaze_file, config.ORLOSKY_POLL_INTERVAL_IN_MILLISEC / 1000)
+        try:
+            # the file may already contain a gaze vector
+            changed = True
+            while self._running:
+                if changed:
+                    # opening a named pipe for reading would block until the tracker opens it for writing
+                    if _is_fifo(gaze_file):
+                        return
+                    try:
+                        with open(gaze_file, "r") as f:
+                            self._handle_line(f.read())
+                    except OSError:
+                        pass
+                changed = watcher.wait(0.1)
+        finally:
+            watcher.close()
+
+    def _read_from_pipe(self, gaze_file: str):
+        # non-blocking, so opening doesn't wait for the tracker and the client can be stopped
+        pipe = os.open(gaze_file, os.O_RDONLY | os.O_NONBLOCK)
+        buffer = b""
+        try:
+            while self._running:
+                readable, _, _ = select.select([pipe], [], [], 0.1)
+                if not readable:
+                    if not _is_same_file(pipe, gaze_file):
+                        # replaced by a file or another pipe, `_run_loop` opens it again
+                        return
+                    continue
+                chunk = os.read(pipe, 4096)
+                if not chunk:
+                    # the tracker closed the pipe, `_run_loop` opens it again for the tracker's next run
+                    time.sleep(0.1)
+                    return
+                # only the newest complete line is used
+                *lines, buffer = (buffer + chunk).split(b"\n")
+                if lines:
+                    self._handle_line(lines[-1].decode())
+        finally:
+            os.close(pipe)
+
+    def _receive_from_socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.bind(("127.0.0.1", self.udp_port))
+            sock.settimeout(0.1)
+            while self._running:
+                try:
+                    data, _ = sock.recvfrom(1024)
+                except socket.timeout:
+                    continue
+                self._handle_line(data.decode())
+        finally:
+            sock.close()
+
+    def _handle_line(self, line: str):
+        line = line.strip()
+        if not line:
+            return
+        try:
+            parts = line.split(",")
+            if len(parts) < 6:
+                return
+            new_vector = (float(parts[3]), float(parts[4]), float(parts[5]))
+        except ValueError:
+            return
+        if new_vector == self._last_vector:
+            return
+
+        self._last_vector = new_vector
+        self._sequence += 1
+        with self._data_lock:
+            self._latest_data = {
+                "x": new_vector[0],
+                "y": new_vector[1],
+                "z": new_vector[2],
+                "capture_timestamp": time.monotonic(),
+                "sequence": self._sequence,
+            }
+        self.data_signal.notify()
+
+
+def _is_fifo(path: str) -> bool:
+    try:
+        return stat.S_ISFIFO(os.stat(path).st_mode)
+    except OSError:
+        return False
+
 
+def _is_same_file(fd: int, path: str) -> bool:
+    try:
+        return os.path.samestat(os.fstat(fd), os.stat(path))
+    except OSError:
+        return False
@@ -1,110 +1,266 @@
+import math
 import threading
 import time
-from datetime import datetime, timedelta
 
 import msgpack
 import zmq
 
+import config
+from misc import DataSignal
+
+import logging
+
+# the newest data of both eyes is only averaged if Pupil saw them at most this far apart
+MAX_BINOCULAR_TIME_DIFFERENCE_IN_SEC = 0.05
+
 
 class PupilClient:
-    def __init__(self, ip="127.0.0.1", port=50020, timeout=0.3):
+    """Subscribes to the data of Pupil Capture via Pupil Remote.
+
+    The messages are received on a thread, which waits on a zmq.Poller. Whenever messages arrive, all queued
+    ones are read at once and only the newest per topic is decoded. If Pupil Capture can't be reached or stops
+    sending, the client reconnects, waiting longer after every failed attempt.
+
+    Only the topics that are used are subscribed to: the 3d pupil data of the `eyes`, or the gaze if `use_gaze`.
+    Data with less than `min_confidence` is dropped. With both eyes, the 3d pupil data of the eyes is averaged,
+    weighted by confidence, and the gaze of both eyes is preferred over the gaze of one."""
+
+    def __init__(
+        self,
+        ip="127.0.0.1",
+        port=50020,
+        timeout=0.3,
+        silence_timeout=5.0,
+        eyes=(0,),
+        flipped_eyes=(),
+        use_gaze=False,
+        min_confidence=0.6,
+    ):
+        """`timeout` is how long Pupil Remote may take to answer, `silence_timeout` how long no messages
+        may arrive before reconnecting. The rotation of the `flipped_eyes` is flipped, for cameras that are
+        mounted upside down."""
+        self.logger = logging.getLogger(self.__class__.__name__)
         self.ip = ip
         self.port = port
         self.timeout = timeout
+        self.silence_timeout = silence_timeout
+        self.eyes = tuple(eyes)
+        self.flipped_eyes = tuple(flipped_eyes)
+        self.use_gaze = use_gaze
+        self.min_confidence = min_confidence
+        self._pupil_topics = {f"pupil.{eye}.3d".encode(): eye for eye in self.eyes}
+        self._binocular_gaze_suffix = f".{''.join(str(eye) for eye in sorted(self.eyes))}.".encode()
 
-        self.last_2d_data = None
         self.last_3d_data = None
+        self.last_gaze_data = None
+        self._eye_data = {}
+        self.data_signal = DataSignal()
+        self._sequence = 0
 
+        self.thread = None
         self._running = False
+        self._stop_event = threading.Event()
         self._ctx = None
-        self._req_subscriber = None
         self._sub_subscriber = None
 
     def start(self):
         self._running = True
-        self.thread = threading.Thread(target=self._subscribe_and_consume)
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._subscribe_and_consume, daemon=True)
         self.thread.start()
 
     def stop(self):
         self._running = False
-        if self.thread.is_alive():
+        self._stop_event.set()
+        if self.thread is not None and self.thread.is_alive():
             self.thread.join(timeout=1)
 
     def get_last_data(self):
         return {
-            "2d": self.last_2d_data,
             "3d": self.last_3d_data,
+            "gaze": self.last_gaze_data,
         }
 
-    def _retry(self, func: callable, try_for_seconds=0):
-        end_time = datetime.now() + timedelta(seconds=try_for_seconds)
-        tried_once = False
-        result = None
-        error = None
-        while not tried_once or (result is None and datetime.now() < end_time):
-            try:
-                if tried_once:
-                    time.sleep(0.1)
-                result = func()
-            except Exception as e:
-                error = e
-            finally:
-                tried_once = True
-        if result is None:
-            raise error
-        return result
-
     def _disconnect(self):
-        if self._req_subscriber is not None:
-            self._req_subscriber.close()
-            self._req_subscriber = None
-
         if self._sub_subscriber is not None:
-            self._sub_subscriber.close()
+            self._sub_subscriber.close(linger=0)
             self._sub_subscriber = None
 
-        if self._ctx is not None:
-            self._ctx.term()
-            self._ctx = None
-
-        self.last_2d_data = None
         self.last_3d_data = None
+        self.last_gaze_data = None
+        self._eye_data = {}
 
-    def _connect(self):
-        self._ctx = zmq.Context()
-        self._req_subscriber = self._ctx.socket(zmq.REQ)
-        self._req_subscriber.setsockopt(zmq.LINGER, 1000)
-        self._req_subscriber.connect(f"tcp://{self.ip}:{self.port}")
+    def _request_sub_port(self) -> str:
+        req_subscriber = self._ctx.socket(zmq.REQ)
+        try:
+            req_subscriber.setsockopt(zmq.LINGER, 0)
+            req_subscriber.connect(f"tcp://{self.ip}:{self.port}")
+            req_subscriber.send_string("SUB_PORT")
+            if not req_subscriber.poll(int(self.timeout * 1000)):
+                raise TimeoutError(f"Pupil Remote didn't answer on {self.ip}:{self.port}")
+            return req_subscriber.recv_string()
+        finally:
+            req_subscriber.close()
 
-        self._req_subscriber.send_string("SUB_PORT")
-        sub_port = self._retry(
-            lambda: self._req_subscriber.recv_string(flags=zmq.NOBLOCK), try_for_seconds=self.timeout
-        )
+    def _connect(self):
+        sub_port = self._request_sub_port()
 
         self._sub_subscriber = self._ctx.socket(zmq.SUB)
-        self._sub_subscriber.setsockopt(zmq.LINGER, 1000)
+        self._sub_subscriber.setsockopt(zmq.LINGER, 0)
+        # CONFLATE doesn't support messages with several parts, so only the queue is bounded
+        self._sub_subscriber.setsockopt(zmq.RCVHWM, config.PUPIL_RECEIVE_HIGH_WATER_MARK)
         self._sub_subscriber.connect(f"tcp://{self.ip}:{sub_port}")
-        self._sub_subscriber.subscribe("gaze.")
-        self._sub_subscriber.subscribe("pupil.")
+        if self.use_gaze:
+            self._sub_subscriber.subscribe("gaze.")
+        else:
+            for topic in self._pupil_topics:
+                self._sub_subscriber.subscribe(topic)
+        self.logger.info(f"connected to {self.ip}:{sub_port}")
+
+    def _receive_newest(self) -> dict[bytes, bytes]:
+        """Reads all queued messages, and returns the newest payload per topic."""
+        newest = {}
+        while True:
+            try:
+                parts = self._sub_subscriber.recv_multipart(flags=zmq.NOBLOCK)
+            except zmq.Again:
+                return newest
+            newest[parts[0]] = parts[1]
+
+    def _handle(self, newest: dict[bytes, bytes], received_at: float):
+        if self.use_gaze:
+            self._handle_gaze(newest, received_at)
+        else:
+            self._handle_pupil(newest, received_at)
+
+    def _handle_pupil(self, newest: dict[bytes, bytes], received_at: float):
+        # the data is only kept once it was used, so a message that can't be used doesn't break the following ones
+        eye_data = dict(self._eye_data)
+        updated = False
+        for topic, eye in self._pupil_topics.items():
+            payload = newest.get(topic)
+            if payload is None:
+                continue
+            message = msgpack.loads(payload)
+            if message.get("confidence", 0.0) >= self.min_confidence:
+                eye_data[eye] = message
+                updated = True
+        if not updated:
+            return
+
+        # only the eyes that were seen at about the same time are averaged
+        newest_timestamp = max(message["timestamp"] for message in eye_data.values())
+        messages = {
+            eye: message
+            for eye, message in eye_data.items()
+            if newest_timestamp - message["timestamp"] <= MAX_BINOCULAR_TIME_DIFFERENCE_IN_SEC
+        }
+        total_confidence = sum(message["confidence"] for message in messages.values())
+        theta = phi = 0.0
+        for eye, message in messages.items():
+            eye_theta, eye_phi = self._get_rotation(message, eye in self.flipped_eyes)
+            # with a PUPIL_MIN_CONFIDENCE of 0, all eyes may have a confidence of 0, then they're weighted equally
+            weight = message["confidence"] / total_confidence if total_confidence > 0 else 1 / len(messages)
+            theta += eye_theta * weight
+            phi += eye_phi * weight
+        self._eye_data = eye_data
+
+        self._publish_3d(
+            {
+                "theta": theta,
+                "phi": phi,
+                "confidence": total_confidence / len(messages),
+                "timestamp": newest_timestamp,
+                "eyes": sorted(messages),
+            },
+            received_at,
+        )
+
+    @staticmethod
+    def _get_rotation(message: dict, flipped: bool) -> tuple[float, float]:
+        if not flipped:
+            return message["theta"], message["phi"]
+        # the same as Pupil calculates theta and phi, from the normal of the pupil rotated by 180°
+        x, y, z = message["circle_3d"]["normal"]
+        r = math.sqrt(x * x + y * y + z * z)
+        return math.acos(-y / r), math.atan2(z, -x)
+
+    def _publish_3d(self, message: dict, received_at: float):
+        self._sequence += 1
+        message["capture_timestamp"] = received_at
+        message["sequence"] = self._sequence
+        self.last_3d_data = message
+        self.data_signal.notify()
+
+    def _handle_gaze(self, newest: dict[bytes, bytes], received_at: float):
+        # e.g. "gaze.3d.01." for both eyes, "gaze.3d.0." for eye 0 alone
+        best = None
+        for topic, payload in newest.items():
+            if topic.endswith(self._binocular_gaze_suffix):
+                rank = 1
+            elif any(topic.endswith(f".{eye}.".encode()) for eye in self.eyes):
+                rank = 0
+            else:
+                continue
+            message = msgpack.loads(payload)
+            if message.get("confidence", 0.0) < self.min_confidence:
+                continue
+            if best is None or (rank, message["confidence"]) > best[0]:
+                best = ((rank, message["confidence"]), message)
+        if best is None:
+            return
+
+        message = best[1]
+        self._sequence += 1
+        self.last_gaze_data = {
+            "norm_pos": tuple(message["norm_pos"]),
+            "confidence": message["confidence"],
+            "timestamp": message["timestamp"],
+            "capture_timestamp": received_at,
+            "sequence": self._sequence,
+        }
+        self.data_signal.notify()
 
     def _subscribe_and_consume(self):
+        self._ctx = zmq.Context()
+        backoff_in_sec = config.PUPIL_RECONNECT_MIN_DELAY_IN_SEC
         while self._running:
             try:
-                if not self._sub_subscriber:
-                    self._connect()
-
-                topic, payload = self._retry(
-                    lambda: self._sub_subscriber.recv_multipart(flags=zmq.NOBLOCK),
-                    try_for_seconds=self.timeout,
-                )
-                message = msgpack.loads(payload)
-                print(message)
-                if topic == b"pupil.0.2d":
-                    self.last_2d_data = message
-                if topic == b"pupil.0.3d":
-                    self.last_3d_data = message
-
+                self._connect()
+                backoff_in_sec = config.PUPIL_RECONNECT_MIN_DELAY_IN_SEC
+                self._consume()
+            except (zmq.ZMQError, TimeoutError) as e:
+                if not self._running:
+                    break
+                self.logger.warning(f"{e}, reconnecting in {backoff_in_sec:.1f}s")
             except Exception:
-                self._disconnect()
+                if not self._running:
+                    break
+                self.logger.exception(f"lost the connection to Pupil Capture, reconnecting in {backoff_in_sec:.1f}s")
+            self._disconnect()
+            self._stop_event.wait(backoff_in_sec)
+            backoff_in_sec = min(2 * backoff_in_sec, config.PUPIL_RECONNECT_MAX_DELAY_IN_SEC)
 
         self._disconnect()
+        self._ctx.term()
+        self._ctx = None
+
+    def _consume(self):
+        """Returns once stopped, raises once no messages arrived for `silence_timeout`."""
+        poller = zmq.Poller()
+        poller.register(self._sub_subscriber, zmq.POLLIN)
+        last_received_at = time.monotonic()
+        while self._running:
+            # the timeout is only there to notice when the client is stopped
+            if not poller.poll(100):
+                if time.monotonic() - last_received_at > self.silence_timeout:
+                    raise TimeoutError(f"no messages from Pupil Capture for {self.silence_timeout}s")
+                continue
+
+            newest = self._receive_newest()
+            last_received_at = time.monotonic()
+            try:
+                self._handle(newest, last_received_at)
+            except Exception:
+                # e.g. a datum without the expected fields, only this message is skipped
+                self.logger.warning("could not handle a message", exc_info=True)
@@ -4,48 +4,51 @@ import cv2
 import tkinter as tk
 from tkinter import ttk
 from PIL import Image, ImageTk
-from pupil_detectors import Detector2D
-from pye3d.detector_3d import CameraModel, Detector3D, DetectorMode
-
-import logging
 
+import config
+from input_methods.clients.camera_discovery import CameraDiscovery, list_cameras, load_last_camera, save_last_camera
+from input_methods.clients.camera_settings import get_default_settings
+from input_methods.clients.detector_process import DetectorProcess
+from input_methods.clients.frame_grabber import FrameGrabber
+from input_methods.clients.pye3d_detector import Pye3DDetector
+from misc import DataSignal, parse_video_source
 
-COLOR_VIOLET = (134, 42, 161)
-COLOR_YELLOW = (0, 237, 254)
+import logging
 
 
 class Pye3DClient:
     @staticmethod
     def detect_cameras(max_cams=10):
-        available_cameras = []
-        for i in range(max_cams):
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                available_cameras.append(i)
-            cap.release()
-        return available_cameras
-
-    def __init__(self, root, source=0, focal_length=1000.0, resolution=(640, 480), max_cams=10):
+        return list_cameras(max_cams)
+
+    def __init__(self, root, source=None, focal_length=1000.0, resolution=(640, 480), max_cams=10):
+        """`source` is a camera index or the path of a video file, by default the last used camera."""
         self.logger = logging.getLogger(self.__class__.__name__)
         self.root = root
-        self.detector_2d = Detector2D()
-        self.camera = CameraModel(
-            focal_length=focal_length, resolution=list(resolution))
-        self.detector_3d = Detector3D(
-            camera=self.camera, long_term_mode=DetectorMode.blocking)
+        detector_kwargs = dict(
+            focal_length=focal_length,
+            resolution=resolution,
+            roi_margin=config.PUPIL_ROI_MARGIN_IN_PX,
+            roi_min_confidence=config.PUPIL_ROI_MIN_CONFIDENCE,
+        )
+        if config.DETECT_IN_SEPARATE_PROCESS:
+            self.detector = DetectorProcess(Pye3DDetector, **detector_kwargs)
+        else:
+            self.detector = Pye3DDetector(**detector_kwargs)
 
-        self._video_capture = None
+        self.grabber = FrameGrabber(self.__class__.__name__, get_default_settings(resolution))
         self._thread = None
         self._running = False
         self._lock = threading.Lock()
         self._latest_result_3d = None
         self._latest_frame = None
+        self._previewed_frame = None
         self._photo = None
+        self.data_signal = DataSignal()
 
-        self._cameras = self.detect_cameras(max_cams=max_cams)
-
-        self._requested_source = None
-        self._source_changed = False
+        self._max_cams = max_cams
+        self._camera_discovery = None
+        self._source = source
 
         self.window = tk.Toplevel(self.root)
         self.window.title("Eye Tracker")
@@ -81,48 +84,69 @@ class Pye3DClient:
 
     def _reset_eyeball(self):
         try:
-            self.detector_3d.reset()
+            self.detector.reset()
         except Exception:
             pass
 
     def _init_camera_selection(self, source):
-        values = [str(i) for i in self._cameras]
+        # the given or last used camera is opened right away, the others are listed once they are discovered
+        if source is None:
+            source = load_last_camera(self.__class__.__name__)
+        self._set_camera_values([], source)
+        self._set_requested_source(parse_video_source(self.cam_var.get()), force=True)
+        # the discovery doesn't probe the camera the grabber has open, the grabber is given some time to open it
+        self._camera_discovery = CameraDiscovery(
+            self._max_cams, lambda: self.grabber.get_open_camera(config.CAMERA_OPEN_TIMEOUT_IN_SEC)
+        )
+        self._reset_eyeball()
+        self.root.after(100, self._poll_camera_discovery)
+
+    def _poll_camera_discovery(self):
+        if not self.window.winfo_exists():
+            return
+        cameras = self._camera_discovery.result
+        if cameras is None:
+            self.root.after(100, self._poll_camera_discovery)
+            return
+
+        selected = self.cam_var.get()
+        values = [str(i) for i in cameras]
+        # a last used camera that isn't there anymore is replaced by the first one found
+        keep = selected != "None" and (selected in values or selected == str(self._source))
+        self._set_camera_values(cameras, selected if keep else None)
+        if self.cam_var.get() != selected:
+            self._set_requested_source(parse_video_source(self.cam_var.get()))
+            self._reset_eyeball()
+
+    def _set_camera_values(self, cameras, source):
+        values = [str(i) for i in cameras]
+        if source is not None and str(source) not in values:
+            values.insert(0, str(source))
         if values:
             self.cam_combo["values"] = values
-            chosen = str(source) if str(source) in values else values[0]
-            self.cam_var.set(chosen)
-            self._set_requested_source(int(chosen), force=True)
-            self._reset_eyeball()
+            self.cam_combo.state(["!disabled"])
+            self.cam_var.set(str(source) if source is not None else values[0])
         else:
             self.cam_combo["values"] = ["None"]
             self.cam_var.set("None")
             self.cam_combo.state(["disabled"])
-            self._set_requested_source(None, force=True)
-            self._reset_eyeball()
 
     def _on_camera_selected(self, _event=None):
-        val = self.cam_var.get()
-        if val == "None":
-            self._set_requested_source(None)
-            self._reset_eyeball()
-            return
-        try:
-            self._set_requested_source(int(val))
-        except ValueError:
-            self._set_requested_source(None)
+        source = parse_video_source(self.cam_var.get())
+        self._set_requested_source(source)
         self._reset_eyeball()
+        if isinstance(source, int):
+            save_last_camera(self.__class__.__name__, source)
 
     def _set_requested_source(self, src, force=False):
-        with self._lock:
-            if force or self._requested_source != src:
-                self._requested_source = src
-                self._source_changed = True
+        self.grabber.set_source(src, force)
 
     def start(self):
         if self._running:
             return
         self._running = True
-        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.grabber.start()
+        self._thread = threading.Thread(target=self._detect_loop, daemon=True)
         self._thread.start()
         self.logger.debug("started")
 
@@ -134,9 +158,8 @@ class Pye3DClient:
             if thread is not None:
                 thread.join()
 
-            if self._video_capture is not None:
-                self._video_capture.release()
-                self._video_capture = None
+            self.grabber.stop()
+            self.detector.close()
 
             if self.window.winfo_exists():
                 self.root.after(0, self.window.destroy)
@@ -152,153 +175,37 @@ class Pye3DClient:
         with self._lock:
             return self._latest_result_3d
 
-    def _apply_source_change_if_needed(self):
+    def _publish(self, result_3d, frame):
+        """The frame is only read by the preview, which draws the overlay onto a copy of it.
+        So it's published without copying, and must not be changed afterwards."""
         with self._lock:
-            changed = self._source_changed
-            src = self._requested_source
-            if changed:
-                self._source_changed = False
+            self._latest_result_3d = result_3d
+            self._latest_frame = frame
+        self.data_signal.notify()
 
-        if not changed:
-            return
-
-        if self._video_capture is not None:
-            try:
-                self._video_capture.release()
-            finally:
-                self._video_capture = None
-
-        if src is None:
-            return
-
-        cap = cv2.VideoCapture(int(src))
-        if cap.isOpened():
-            self._video_capture = cap
-        else:
-            cap.release()
-            self._video_capture = None
-
-    def _try_open_requested_source(self):
-        with self._lock:
-            src = self._requested_source
-
-        if src is None:
-            return False
-
-        cap = cv2.VideoCapture(int(src))
-        if cap.isOpened():
-            if self._video_capture is not None:
-                try:
-                    self._video_capture.release()
-                finally:
-                    self._video_capture = None
-            self._video_capture = cap
-            return True
-
-        cap.release()
-        return False
-
-    def _capture_loop(self):
-        last_retry = 0.0
+    def _detect_loop(self):
+        last_sequence = 0
 
         while self._running:
-            self._apply_source_change_if_needed()
-
-            if self._video_capture is None or not self._video_capture.isOpened():
-                now = time.time()
-                if now - last_retry >= 0.5:
-                    last_retry = now
-                    self._try_open_requested_source()
-
-                with self._lock:
-                    self._latest_result_3d = None
-                    self._latest_frame = None
-                time.sleep(0.05)
+            frame = self.grabber.wait_for_frame(last_sequence, timeout_in_sec=0.1)
+            if frame is None:
+                if not self.grabber.is_open() and self._latest_frame is not None:
+                    self._publish(None, None)
                 continue
+            last_sequence = frame.sequence
 
-            ret, eye_frame = self._video_capture.read()
-            if not ret or eye_frame is None:
-                try:
-                    self._video_capture.release()
-                finally:
-                    self._video_capture = None
-
-                with self._lock:
-                    self._latest_result_3d = None
-                    self._latest_frame = None
-
-                time.sleep(0.05)
-                continue
+            try:
+                result_3d = self.detector.process(frame.image, frame.frame_number, frame.fps)
 
-            fps = self._video_capture.get(cv2.CAP_PROP_FPS) or 24.0
-            frame_number = self._video_capture.get(cv2.CAP_PROP_POS_FRAMES)
+                if result_3d is not None:
+                    result_3d["capture_timestamp"] = frame.captured_at
+                    result_3d["sequence"] = frame.sequence
 
-            try:
-                gray = cv2.cvtColor(eye_frame, cv2.COLOR_BGR2GRAY)
-                result_2d = self.detector_2d.detect(gray)
-
-                if result_2d is None:
-                    with self._lock:
-                        self._latest_result_3d = None
-                        self._latest_frame = eye_frame.copy()
-                    time.sleep(0.01)
-                    continue
-
-                result_2d["timestamp"] = frame_number / \
-                    fps if fps and fps > 0 else time.time()
-                result_2d["method"] = "2d c++"
-
-                result_3d = self.detector_3d.update_and_detect(result_2d, gray)
-
-                if result_3d is None:
-                    with self._lock:
-                        self._latest_result_3d = None
-                        self._latest_frame = eye_frame.copy()
-                    time.sleep(0.01)
-                    continue
-
-                ellipse_3d = result_3d.get("ellipse")
-                projected_sphere = result_3d.get("projected_sphere")
-
-                if ellipse_3d and "center" in ellipse_3d and "axes" in ellipse_3d:
-                    cv2.ellipse(
-                        eye_frame,
-                        tuple(int(v) for v in ellipse_3d["center"]),
-                        tuple(int(v / 2) for v in ellipse_3d["axes"]),
-                        ellipse_3d.get("angle", 0.0),
-                        0,
-                        360,
-                        COLOR_YELLOW,
-                        thickness=3,
-                    )
-
-                if projected_sphere and "center" in projected_sphere and "axes" in projected_sphere:
-                    cv2.ellipse(
-                        eye_frame,
-                        tuple(int(v) for v in projected_sphere["center"]),
-                        tuple(int(v / 2) for v in projected_sphere["axes"]),
-                        (ellipse_3d or {}).get("angle", 0.0),
-                        0,
-                        360,
-                        COLOR_VIOLET,
-                        thickness=3,
-                    )
-
-                with self._lock:
-                    self._latest_result_3d = result_3d
-                    self._latest_frame = eye_frame.copy()
+                self._publish(result_3d, frame.image)
 
             except Exception:
-                with self._lock:
-                    self._latest_result_3d = None
-                    self._latest_frame = None
+                self._publish(None, None)
                 time.sleep(0.02)
-                continue
-
-            if fps and fps > 0:
-                time.sleep(1.0 / fps)
-            else:
-                time.sleep(0.04)
 
         self._running = False
 
@@ -306,21 +213,25 @@ class Pye3DClient:
         if not self.window.winfo_exists():
             return
 
-        frame = None
-        with self._lock:
-            if self._latest_frame is not None:
-                frame = self._latest_frame.copy()
+        # nothing to do while the preview is minimized or hidden
+        if self.label.winfo_viewable():
+            with self._lock:
+                frame = self._latest_frame
+                result_3d = self._latest_result_3d
 
-        if frame is not None:
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(rgb)
+            if frame is not None and frame is not self._previewed_frame:
+                self._previewed_frame = frame
+                frame = frame.copy()
+                if result_3d is not None:
+                    Pye3DDetector.draw_overlay(frame, result_3d)
 
-            w = self.label.winfo_width()
-            h = self.label.winfo_height()
-            if w > 1 and h > 1:
-                img = img.resize((w, h), Image.Resampling.LANCZOS)
+                w = self.label.winfo_width()
+                h = self.label.winfo_height()
+                if w > 1 and h > 1:
+                    frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_LINEAR)
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
-            self._photo = ImageTk.PhotoImage(image=img)
-            self.label.configure(image=self._photo)
+                self._photo = ImageTk.PhotoImage(image=Image.fromarray(rgb))
+                self.label.configure(image=self._photo)
 
-        self.root.after(15, self._update_tk_image)
+        self.root.after(config.PREVIEW_INTERVAL_IN_MILLISEC, self._update_tk_image)
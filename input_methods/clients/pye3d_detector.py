@@ -0,0 +1,125 @@
+import time
+
+import cv2
+from pupil_detectors import Detector2D, Roi
+from pye3d.detector_3d import CameraModel, Detector3D, DetectorMode
+
+COLOR_VIOLET = (134, 42, 161)
+COLOR_YELLOW = (0, 237, 254)
+
+
+class Pye3DDetector:
+    """Detects the pupil in a frame of an eye camera and fits the 3d eye model on it.
+    Doesn't depend on Tk, so it can run in benchmarks and other processes as well.
+
+    The stages are separate methods, so they can be timed separately:
+    `convert` the BGR frame, `detect` on the converted frame and `draw_overlay` onto the BGR frame.
+
+    Once the pupil was found, the 2d detector only searches a region of interest around it,
+    `roi_margin` pixels larger than the pupil. If the pupil isn't found there with at least
+    `roi_min_confidence`, the whole frame is searched again. A `roi_margin` of 0 always searches the whole frame.
+
+    The resolution of the camera model follows the frames, whatever the camera delivers."""
+
+    def __init__(self, focal_length=1000.0, resolution=(640, 480), roi_margin=0, roi_min_confidence=0.6):
+        self.detector_2d = Detector2D()
+        self.camera = CameraModel(focal_length=focal_length, resolution=list(resolution))
+        self.detector_3d = Detector3D(camera=self.camera, long_term_mode=DetectorMode.blocking)
+        self.roi_margin = roi_margin
+        self.roi_min_confidence = roi_min_confidence
+        self._roi = None
+
+    def reset(self):
+        self._roi = None
+        self.detector_3d.reset()
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def convert(frame):
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def process(self, frame, frame_number=None, fps=None):
+        """`convert` and `detect` in one."""
+        return self.detect(self.convert(frame), frame_number, fps)
+
+    def detect(self, gray, frame_number=None, fps=None):
+        """Returns the result of the 3d detector, or None if no pupil was found.
+        The detector's timestamp is taken from the frame number, if the fps are known."""
+        height, width = gray.shape[:2]
+        if (width, height) != tuple(self.camera.resolution):
+            self.camera = CameraModel(focal_length=self.camera.focal_length, resolution=[width, height])
+            self.detector_3d.reset_camera(self.camera)
+            self._roi = None
+
+        result_2d = self._detect_2d(gray)
+        if result_2d is None:
+            return None
+
+        result_2d["timestamp"] = frame_number / fps if frame_number is not None and fps and fps > 0 else time.time()
+        result_2d["method"] = "2d c++"
+
+        return self.detector_3d.update_and_detect(result_2d, gray)
+
+    def _detect_2d(self, gray):
+        height, width = gray.shape[:2]
+        roi = self._roi
+        if roi is not None and roi.x_max < width and roi.y_max < height:
+            # the result is in the coordinates of the whole frame
+            result_2d = self.detector_2d.detect(gray, roi=roi)
+            if result_2d is not None and result_2d["confidence"] >= self.roi_min_confidence:
+                self._update_roi(result_2d, width, height)
+                return result_2d
+
+        result_2d = self.detector_2d.detect(gray)
+        self._update_roi(result_2d, width, height)
+        return result_2d
+
+    def _update_roi(self, result_2d, width, height):
+        if self.roi_margin <= 0 or result_2d is None or result_2d["confidence"] < self.roi_min_confidence:
+            self._roi = None
+            return
+        center_x, center_y = result_2d["ellipse"]["center"]
+        radius = max(result_2d["ellipse"]["axes"]) / 2 + self.roi_margin
+        self._roi = Roi(
+            max(0, int(center_x - radius)),
+            max(0, int(center_y - radius)),
+            min(width - 1, int(center_x + radius)),
+            min(height - 1, int(center_y + radius)),
+        )
+
+    @staticmethod
+    def draw_overlay(frame, result_3d):
+        ellipse_3d = result_3d.get("ellipse")
+        projected_sphere = result_3d.get("projected_sphere")
+
+        # pye3d reports negative axes for ellipses it couldn't project
+        if ellipse_3d and "center" in ellipse_3d and "axes" in ellipse_3d and min(ellipse_3d["axes"]) >= 0:
+            cv2.ellipse(
+                frame,
+                tuple(int(v) for v in ellipse_3d["center"]),
+                tuple(int(v / 2) for v in ellipse_3d["axes"]),
+                ellipse_3d.get("angle", 0.0),
+                0,
+                360,
+                COLOR_YELLOW,
+                thickness=3,
+            )
+
+        if (
+            projected_sphere
+            and "center" in projected_sphere
+            and "axes" in projected_sphere
+            and min(projected_sphere["axes"]) >= 0
+        ):
+            cv2.ellipse(
+                frame,
+                tuple(int(v) for v in projected_sphere["center"]),
+                tuple(int(v / 2) for v in projected_sphere["axes"]),
+                (ellipse_3d or {}).get("angle", 0.0),
+                0,
+                360,
+                COLOR_VIOLET,
+                thickness=3,
+            )
@@ -0,0 +1,103 @@
+import queue
+import threading
+import time
+from typing import Optional
+
+from gaze_sample import GazeSample
+from input_methods.recording import read_recording
+from misc import DataSignal
+
+import logging
+
+
+class ReplayClient:
+    """Plays the GazeSamples of a recording with their original timing, `speed` times faster.
+
+    With a speed of 0, the samples are played as fast as possible: each sample is handed over to the consumer
+    in `wait_for_sample`, and the next one is only played once it was taken, so no sample is skipped or repeated."""
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.data_signal = DataSignal()
+
+        self._lock = threading.Lock()
+        self._latest_sample: Optional[GazeSample] = None
+        self._handover: queue.Queue = queue.Queue(maxsize=1)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._play, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def wait_for_sample(self, timeout_in_sec: float) -> bool:
+        """Waits for the next sample. Returns True if there is a new one for `get_latest_sample`."""
+        if self.speed > 0:
+            return self.data_signal.wait(timeout_in_sec)
+        try:
+            sample = self._handover.get(timeout=timeout_in_sec)
+        except queue.Empty:
+            return False
+        with self._lock:
+            self._latest_sample = sample
+        return True
+
+    def get_latest_sample(self) -> Optional[GazeSample]:
+        with self._lock:
+            return self._latest_sample
+
+    def _publish(self, sample: Optional[GazeSample]):
+        if self.speed <= 0:
+            # blocks until the consumer took the previous sample
+            while self._running:
+                try:
+                    self._handover.put(sample, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+            return
+        with self._lock:
+            self._latest_sample = sample
+        self.data_signal.notify()
+
+    def _play(self):
+        try:
+            while self._running:
+                self._play_once()
+                if not self.loop:
+                    break
+        except Exception:
+            self.logger.exception(f'could not replay "{self.path}"')
+        self._publish(None)
+        self.logger.info("replay finished")
+
+    def _play_once(self):
+        started_at = time.monotonic()
+        first_timestamp = None
+        for sample in read_recording(self.path):
+            if not self._running:
+                return
+            if first_timestamp is None:
+                first_timestamp = sample.timestamp
+
+            if self.speed > 0:
+                due_at = started_at + (sample.timestamp - first_timestamp) / self.speed
+                delay = due_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            # the sample is captured now, as far as the rest of the pipeline is concerned
+            self._publish(
+                GazeSample(sample.vector, time.monotonic(), sample.sequence, sample.confidence, sample.source)
+            )
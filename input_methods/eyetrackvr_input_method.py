@@ -1,5 +1,7 @@
 from typing import Optional
 
+import config
+from gaze_sample import GazeSample
 from input_methods.input_method import InputMethod
 from misc import Vector
 from input_methods.clients.eyetrackvr_client import EyeTrackVRClient
@@ -10,7 +12,7 @@ import logging
 class EyeTrackVRInputMethod(InputMethod):
     def __init__(self, root_window):
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.eyetrackvr = EyeTrackVRClient()
+        self.eyetrackvr = EyeTrackVRClient(eye=config.EYETRACKVR_EYE, address=config.EYETRACKVR_OSC_ADDRESS)
         self.logger.info("initialized")
 
     def start(self):
@@ -19,9 +21,24 @@ class EyeTrackVRInputMethod(InputMethod):
 
     def stop(self):
         self.eyetrackvr.stop()
-        self.logger.info("stopped")
+        self.logger.info(
+            f"stopped, received {self.eyetrackvr.received} messages, consumed {self.eyetrackvr.consumed}"
+        )
+
+    def wait_for_new_data(self, timeout_in_sec: float) -> bool:
+        return self.eyetrackvr.data_signal.wait(timeout_in_sec)
 
     def get_next_vector(self) -> Optional[Vector]:
-        next_vector = self.eyetrackvr.get_last_data()
-        self.logger.debug(f"next_vector: {next_vector}")
-        return next_vector
+        next_sample = self.get_next_sample()
+        return next_sample.vector if next_sample else None
+
+    def get_next_sample(self) -> Optional[GazeSample]:
+        last_data = self.eyetrackvr.get_last_sample()
+        next_sample = GazeSample(
+            (last_data["x"], last_data["y"]),
+            last_data["capture_timestamp"],
+            last_data["sequence"],
+            source="eyetrackvr",
+        ) if last_data else None
+        self.logger.debug(f"next_sample: {next_sample}")
+        return next_sample
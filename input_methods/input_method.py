@@ -1,7 +1,11 @@
+import time
 from abc import ABC, abstractmethod
 from misc import Vector
 from typing import Optional
 
+import config
+from gaze_sample import GazeSample
+
 
 class InputMethod(ABC):
     """Provides any kind of two-dimensional vector.
@@ -20,7 +24,27 @@ class InputMethod(ABC):
         pass
 
     @abstractmethod
-    def get_next_vector(self, timeout_in_ms: int) -> Optional[Vector]:
+    def get_next_vector(self) -> Optional[Vector]:
         """Gets the current vector, if one is available.
-        Returns None if the InputMethod is not running or we hit the timeout."""
+        Returns None if the InputMethod is not running or has no data."""
         pass
+
+    def get_next_sample(self) -> Optional[GazeSample]:
+        """Gets the current vector as a GazeSample, if one is available.
+
+        By default, the vector from `get_next_vector` is stamped with the current time.
+        InputMethods that know when and how confidently a vector was captured should override this."""
+        vector = self.get_next_vector()
+        if vector is None:
+            return None
+        self._sample_sequence = getattr(self, "_sample_sequence", 0) + 1
+        return GazeSample(tuple(vector), time.monotonic(), self._sample_sequence, source=self.__class__.__name__)
+
+    def wait_for_new_data(self, timeout_in_sec: float) -> bool:
+        """Blocks until the InputMethod has new data, or the timeout is hit.
+        Returns True if new data is available.
+
+        InputMethods whose source signals new samples should override this.
+        By default, the InputMethod is polled every INPUT_POLL_INTERVAL_IN_MILLISEC."""
+        time.sleep(min(timeout_in_sec, config.INPUT_POLL_INTERVAL_IN_MILLISEC / 1000))
+        return True
@@ -1,6 +1,7 @@
 from typing import Optional
 
 from input_methods.clients.opentrack_client import OpentrackClient
+from gaze_sample import GazeSample
 from input_methods.input_method import InputMethod
 from misc import Vector
 
@@ -22,9 +23,20 @@ class OpentrackInputMethod(InputMethod):
         self.opentrack.stop()
         self.logger.info("stopped")
 
+    def wait_for_new_data(self, timeout_in_sec: float) -> bool:
+        return self.opentrack.data_signal.wait(timeout_in_sec)
+
     def get_next_vector(self) -> Optional[Vector]:
+        next_sample = self.get_next_sample()
+        return next_sample.vector if next_sample else None
+
+    def get_next_sample(self) -> Optional[GazeSample]:
         head = self.opentrack.get_last_data()
-        next_vector = (head["yaw"],
-                       head["pitch"]) if head is not None else None
-        self.logger.debug(f"next_vector: {next_vector}")
-        return next_vector
+        next_sample = GazeSample(
+            (head["yaw"], head["pitch"]),
+            head["capture_timestamp"],
+            head["sequence"],
+            source="opentrack",
+        ) if head is not None else None
+        self.logger.debug(f"next_sample: {next_sample}")
+        return next_sample
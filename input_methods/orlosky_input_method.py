@@ -1,6 +1,8 @@
 from typing import Optional
 
+import config
 from input_methods.clients.orlosky_client import OrloskyClient
+from gaze_sample import GazeSample
 from input_methods.input_method import InputMethod
 from misc import Vector
 
@@ -10,7 +12,7 @@ import logging
 class OrloskyInputMethod(InputMethod):
     def __init__(self, root_window):
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.orlosky = OrloskyClient()
+        self.orlosky = OrloskyClient(udp_port=config.ORLOSKY_UDP_PORT)
         self.logger.info("initialized")
 
     def start(self):
@@ -21,8 +23,15 @@ class OrloskyInputMethod(InputMethod):
         self.orlosky.stop()
         self.logger.info("stopped")
 
+    def wait_for_new_data(self, timeout_in_sec: float) -> bool:
+        return self.orlosky.data_signal.wait(timeout_in_sec)
+
     def get_next_vector(self) -> Optional[Vector]:
-        next_vector = None
+        next_sample = self.get_next_sample()
+        return next_sample.vector if next_sample else None
+
+    def get_next_sample(self) -> Optional[GazeSample]:
+        next_sample = None
 
         last_data = self.orlosky.get_last_data()
         if last_data:
@@ -31,7 +40,12 @@ class OrloskyInputMethod(InputMethod):
             z = last_data["z"]
 
             if z != 0:  # Avoid division by zero
-                next_vector = (x / z, y / z)
-
-        self.logger.debug(f"next_vector: {next_vector}")
-        return next_vector
+                next_sample = GazeSample(
+                    (x / z, y / z),
+                    last_data["capture_timestamp"],
+                    last_data["sequence"],
+                    source="orlosky",
+                )
+
+        self.logger.debug(f"next_sample: {next_sample}")
+        return next_sample
@@ -1,6 +1,8 @@
 from typing import Optional
 
+import config
 from input_methods.clients.pupil_client import PupilClient
+from gaze_sample import GazeSample
 from input_methods.input_method import InputMethod
 from misc import Vector
 
@@ -10,7 +12,12 @@ import logging
 class PupilInputMethod(InputMethod):
     def __init__(self, root_window):
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.pupil = PupilClient()
+        self.pupil = PupilClient(
+            eyes=config.PUPIL_EYES,
+            flipped_eyes=config.PUPIL_FLIPPED_EYES,
+            use_gaze=config.PUPIL_USE_GAZE,
+            min_confidence=config.PUPIL_MIN_CONFIDENCE,
+        )
         self.logger.info("initialized")
 
     def start(self):
@@ -21,9 +28,26 @@ class PupilInputMethod(InputMethod):
         self.pupil.stop()
         self.logger.info("stopped")
 
+    def wait_for_new_data(self, timeout_in_sec: float) -> bool:
+        return self.pupil.data_signal.wait(timeout_in_sec)
+
     def get_next_vector(self) -> Optional[Vector]:
-        last_data = self.pupil.get_last_data()["3d"]
-        next_vector = (last_data["theta"],
-                       last_data["phi"]) if last_data else None
-        self.logger.debug(f"next_vector: {next_vector}")
-        return next_vector
+        next_sample = self.get_next_sample()
+        return next_sample.vector if next_sample else None
+
+    def get_next_sample(self) -> Optional[GazeSample]:
+        if self.pupil.use_gaze:
+            last_data = self.pupil.get_last_data()["gaze"]
+            vector = last_data["norm_pos"] if last_data else None
+        else:
+            last_data = self.pupil.get_last_data()["3d"]
+            vector = (last_data["theta"], last_data["phi"]) if last_data else None
+        next_sample = GazeSample(
+            vector,
+            last_data["capture_timestamp"],
+            last_data["sequence"],
+            confidence=last_data.get("confidence"),
+            source="pupil",
+        ) if last_data else None
+        self.logger.debug(f"next_sample: {next_sample}")
+        return next_sample
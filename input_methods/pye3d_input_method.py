@@ -1,6 +1,8 @@
 from typing import Optional
 
+import config
 from input_methods.clients.pye3d_client import Pye3DClient
+from gaze_sample import GazeSample
 from input_methods.input_method import InputMethod
 from misc import Vector
 
@@ -10,7 +12,9 @@ import logging
 class Pye3dInputMethod(InputMethod):
     def __init__(self, root_window):
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.pye3d = Pye3DClient(root_window)
+        self.pye3d = Pye3DClient(
+            root_window, source=config.VIDEO_SOURCE
+        )
         self.logger.info("initialized")
 
     def start(self):
@@ -21,9 +25,21 @@ class Pye3dInputMethod(InputMethod):
         self.pye3d.stop()
         self.logger.info("stopped")
 
+    def wait_for_new_data(self, timeout_in_sec: float) -> bool:
+        return self.pye3d.data_signal.wait(timeout_in_sec)
+
     def get_next_vector(self) -> Optional[Vector]:
+        next_sample = self.get_next_sample()
+        return next_sample.vector if next_sample else None
+
+    def get_next_sample(self) -> Optional[GazeSample]:
         last_data = self.pye3d.get_latest_data()
-        next_vector = (last_data["theta"],
-                       last_data["phi"]) if last_data else None
-        self.logger.debug(f"next_vector: {next_vector}")
-        return next_vector
+        next_sample = GazeSample(
+            (last_data["theta"], last_data["phi"]),
+            last_data["capture_timestamp"],
+            last_data["sequence"],
+            confidence=last_data.get("confidence"),
+            source="pye3d",
+        ) if last_data else None
+        self.logger.debug(f"next_sample: {next_sample}")
+        return next_sample
@@ -0,0 +1,69 @@
+import math
+import struct
+from typing import BinaryIO, Iterator, Optional
+
+from gaze_sample import GazeSample
+
+# A recording is a header followed by one record per sample, all little-endian.
+# header: magic b"MIRR", format version, length of the utf-8 encoded source that follows the header
+HEADER = struct.Struct("<4sHH")
+MAGIC = b"MIRR"
+VERSION = 1
+# record: x, y, capture time in nanoseconds of the monotonic clock, sequence, confidence (NaN if unknown)
+RECORD = struct.Struct("<ddqQd")
+
+
+class SampleRecorder:
+    """Records the GazeSamples of an InputMethod to a file, to replay them later with the ReplayInputMethod."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: Optional[BinaryIO] = None
+        self._source: Optional[str] = None
+
+    def record(self, sample: GazeSample):
+        if self._file is None:
+            self._source = sample.source or ""
+            source = self._source.encode()
+            self._file = open(self.path, "wb")
+            self._file.write(HEADER.pack(MAGIC, VERSION, len(source)) + source)
+        self._file.write(
+            RECORD.pack(
+                sample.vector[0],
+                sample.vector[1],
+                int(sample.timestamp * 1_000_000_000),
+                sample.sequence,
+                math.nan if sample.confidence is None else sample.confidence,
+            )
+        )
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_recording(path: str) -> Iterator[GazeSample]:
+    """Reads the GazeSamples of a recording, in the order they were recorded."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return
+        magic, version, source_length = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'"{path}" is not a recording of version {VERSION}')
+        source = f.read(source_length).decode() or None
+
+        while True:
+            data = f.read(RECORD.size * 1024)
+            complete_records = data[: len(data) - len(data) % RECORD.size]
+            for x, y, timestamp_ns, sequence, confidence in RECORD.iter_unpack(complete_records):
+                yield GazeSample(
+                    (x, y),
+                    timestamp_ns / 1_000_000_000,
+                    sequence,
+                    None if math.isnan(confidence) else confidence,
+                    source,
+                )
+            if len(data) < RECORD.size * 1024:
+                return
@@ -0,0 +1,47 @@
+import tkinter.filedialog as fd
+from typing import Optional
+
+import config
+from gaze_sample import GazeSample
+from input_methods.clients.replay_client import ReplayClient
+from input_methods.input_method import InputMethod
+from misc import Vector
+
+import logging
+
+
+class ReplayInputMethod(InputMethod):
+    """Replays a recording made with `--record`.
+    The file and speed are taken from REPLAY_FILE and REPLAY_SPEED, if no file is set the user is asked for one."""
+
+    def __init__(self, root_window, path=None, speed=None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        path = path or config.REPLAY_FILE or fd.askopenfilename(
+            parent=root_window, title="Select a recording to replay"
+        )
+        self.replay = ReplayClient(path, speed if speed is not None else config.REPLAY_SPEED) if path else None
+        self.logger.info(f"initialized with {path}")
+
+    def start(self):
+        if self.replay is not None:
+            self.replay.start()
+        self.logger.info("started")
+
+    def stop(self):
+        if self.replay is not None:
+            self.replay.stop()
+        self.logger.info("stopped")
+
+    def wait_for_new_data(self, timeout_in_sec: float) -> bool:
+        if self.replay is None:
+            return super().wait_for_new_data(timeout_in_sec)
+        return self.replay.wait_for_sample(timeout_in_sec)
+
+    def get_next_vector(self) -> Optional[Vector]:
+        next_sample = self.get_next_sample()
+        return next_sample.vector if next_sample else None
+
+    def get_next_sample(self) -> Optional[GazeSample]:
+        next_sample = self.replay.get_latest_sample() if self.replay is not None else None
+        self.logger.debug(f"next_sample: {next_sample}")
+        return next_sample
@@ -0,0 +1,35 @@
+import threading
+import time
+
+
+class LatestValueMailbox:
+    """A mailbox that only keeps the latest payload per message type.
+
+    Putting a message whose type is already waiting replaces the older payload,
+    so a slow consumer never works through a backlog of outdated messages and
+    the mailbox never holds more than one message per type."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._messages: dict[str, tuple[object, float]] = {}
+        self.coalesced: dict[str, int] = {}
+
+    def put(self, msg: str, payload: object) -> bool:
+        """Puts the message into the mailbox. Returns True if it replaced an older message of the same type."""
+        with self._lock:
+            replaced = msg in self._messages
+            if replaced:
+                self.coalesced[msg] = self.coalesced.get(msg, 0) + 1
+            self._messages[msg] = (payload, time.perf_counter())
+            return replaced
+
+    def take_all(self) -> list[tuple[str, object, float]]:
+        """Takes all waiting messages as (msg, payload, put_at) tuples, in the order their types first arrived."""
+        with self._lock:
+            messages = self._messages
+            self._messages = {}
+        return [(msg, payload, put_at) for msg, (payload, put_at) in messages.items()]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._messages)
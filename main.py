@@ -1,10 +1,14 @@
-import argparse
-import queue
 import time
+
+# for the startup time report, taken before anything else is imported
+started_at = time.perf_counter()
+
+import argparse
+import multiprocessing
 import traceback
 from datetime import datetime, timedelta
 from threading import Event, Thread
-from typing import Callable, Iterator, List, Optional, Tuple
+from typing import Callable, Iterator, List, Optional
 
 import numpy as np
 import screeninfo
@@ -13,20 +17,30 @@ import calibration
 import config
 from calibration import CalibrationInstruction, CalibrationResult
 from input_methods import input_methods
+from input_methods.recording import SampleRecorder
+from latest_value_mailbox import LatestValueMailbox
+from metrics import MetricsReporter, metrics, parse_metrics_target
 from guis.tkinter.calibration_window import CalibrationWindow, CalibrationWindowButton
 from guis.tkinter.main_menu_window import MainMenuWindow
 from guis.tkinter.release_notes_window import show_release_notes_if_needed
+from gaze_sample import GazeSample
 from misc import Vector
-from mouse_movement import MouseMovementType
+from mouse_movement import get_new_mouse_position, scale_vector_to_screen
 from output_methods import output_methods
+from output_methods.output_worker import OutputWorker
 from tracking_approaches import tracking_approaches
 
 import logging
 import sys
 
-if getattr(sys, "frozen", False):
-    import pyi_splash
-    pyi_splash.close()
+
+def metrics_target(value: str) -> str:
+    try:
+        parse_metrics_target(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
 
 parser = argparse.ArgumentParser()
 parser.add_argument(
@@ -48,6 +62,39 @@ parser.add_argument(
     choices=output_methods,
     default=next(iter(output_methods)),
 )
+parser.add_argument(
+    "--metrics",
+    type=metrics_target,
+    help="Periodically report latency and throughput metrics to file:PATH, udp:HOST:PORT or http:PORT.",
+    metavar="TARGET",
+)
+parser.add_argument(
+    "--video-source",
+    help="The camera index or the path of a video file for the camera based input methods.",
+    metavar="SOURCE",
+)
+parser.add_argument(
+    "--detect-in-separate-process",
+    action="store_true",
+    help="Run the detection of the camera based input methods in a separate process.",
+    default=config.DETECT_IN_SEPARATE_PROCESS,
+)
+parser.add_argument(
+    "--record",
+    help="Record the samples of the input method to this file, to replay them later.",
+    metavar="PATH",
+)
+parser.add_argument(
+    "--replay-file",
+    help='The recording to play with the "replay" input method.',
+    metavar="PATH",
+)
+parser.add_argument(
+    "--replay-speed",
+    type=float,
+    help='How many times faster than recorded to replay, 0 for as fast as possible. default="%(default)s"',
+    default=config.REPLAY_SPEED,
+)
 parser.add_argument(
     "--log-level",
     help='default="%(default)s"',
@@ -55,8 +102,6 @@ parser.add_argument(
     choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
 )
 
-args = parser.parse_args()
-
 
 def setup_logging(args) -> None:
     level = getattr(logging, args.log_level)
@@ -77,7 +122,11 @@ def setup_logging(args) -> None:
     root.addHandler(handler)
 
 
-setup_logging(args)
+# set on startup, see the end of this file
+args = None
+monitor = None
+last_mouse_position = None
+recorder = None
 
 selected_input_method = None
 selected_tracking_approach = None
@@ -98,15 +147,20 @@ in_calibration = False
 
 request_loop_thread = None
 last_input_method_vector = None
-monitor = screeninfo.get_monitors()[0]
-last_mouse_position = [monitor.width / 2, monitor.height / 2]
 
 logger = logging.getLogger(__name__)
 
-logger.info(f"{config.APP_FULL_NAME} {config.APP_VERSION}")
+# Only the latest message per type is kept, so a stalling Tk thread never replays old gaze points.
+ui_mailbox = LatestValueMailbox()
+
+# Pushes to output methods which don't need the Tk thread.
+output_worker = OutputWorker()
 
-UiMsg = Tuple[str, object]
-ui_queue: "queue.SimpleQueue[UiMsg]" = queue.SimpleQueue()
+
+def put_ui_msg(msg: str, payload: object):
+    if ui_mailbox.put(msg, payload):
+        metrics.increment(f"ui_coalesced.{msg}")
+    metrics.set_gauge("ui_queue_depth", len(ui_mailbox))
 
 
 def reload_input_method(input_method_key, root_window):
@@ -131,9 +185,12 @@ def reload_output_method(output_method_key, root_window):
     global selected_output_method, output_method
     selected_output_method = output_method_key
     if output_method is not None:
+        output_worker.set_output_method(None)
         output_method.stop()
     output_method = output_methods[selected_output_method].clazz(root_window)
     output_method.start()
+    if not output_method.needs_ui_thread:
+        output_worker.set_output_method(output_method)
 
 
 def reload_calibration_result():
@@ -150,30 +207,64 @@ def reload_calibration_result():
 
 def loop():
     global last_input_method_vector, last_mouse_position
+    last_processed_at = None
+    last_sample = None
     while not stop_event.is_set():
         try:
-            last_input_method_vector = input_method.get_next_vector()
+            # Blocks until the input method signals a new sample. On timeout, we still
+            # report whether there is data, but don't re-process the stale vector.
+            has_new_data = input_method.wait_for_new_data(config.LOOP_SLEEP_IN_MILLISEC / 1000)
+            started_at = time.perf_counter()
+            sample = input_method.get_next_sample()
+            metrics.record_duration("input", time.perf_counter() - started_at)
+            last_input_method_vector = sample.vector if sample is not None else None
+
+            put_ui_msg("input_method_has_data", sample is not None)
 
-            ui_queue.put(("input_method_has_data", last_input_method_vector is not None))
+            if recorder is not None and has_new_data and sample is not None:
+                recorder.record(sample)
+
+            if sample is not None and tracking_approach.is_calibrated():
+                if not has_new_data:
+                    continue
 
-            if last_input_method_vector is not None and tracking_approach.is_calibrated():
-                mouse_movement = tracking_approach.get_next_mouse_movement(last_input_method_vector)
+                metrics.increment("samples")
+                if last_sample is not None and last_sample.source == sample.source:
+                    if sample.sequence > last_sample.sequence + 1:
+                        metrics.increment("dropped_samples", sample.sequence - last_sample.sequence - 1)
+                last_sample = sample
+
+                now = time.monotonic()
+                elapsed_in_sec = config.LOOP_SLEEP_IN_MILLISEC / 1000
+                if last_processed_at is not None:
+                    elapsed_in_sec = min(now - last_processed_at, elapsed_in_sec)
+                last_processed_at = now
+
+                started_at = time.perf_counter()
+                mouse_movement = tracking_approach.get_next_mouse_movement_for_sample(sample)
+                metrics.record_duration("tracking", time.perf_counter() - started_at)
                 if mouse_movement is not None:
-                    last_mouse_position = get_new_mouse_position(mouse_movement, last_mouse_position)
+                    started_at = time.perf_counter()
+                    last_mouse_position = get_new_mouse_position(
+                        mouse_movement, last_mouse_position, elapsed_in_sec, monitor.width, monitor.height
+                    )
+                    metrics.record_duration("mouse_position", time.perf_counter() - started_at)
 
                     # Schedule UI update (Tk thread will decide which window to paint on)
-                    ui_queue.put(("mouse_point", tuple(last_mouse_position)))
+                    put_ui_msg("mouse_point", tuple(last_mouse_position))
 
-                    # Publisher might touch Tk internally; keep on Tk thread too
-                    ui_queue.put(("output_method_push", tuple(last_mouse_position)))
+                    output_sample = sample.with_vector(tuple(last_mouse_position))
+                    if not output_worker.submit(output_sample):
+                        # Publisher might touch Tk internally; keep on Tk thread too
+                        put_ui_msg("output_method_push", output_sample)
 
             else:
-                ui_queue.put(("unset_mouse_point", None))
+                last_processed_at = None
+                put_ui_msg("mouse_point", None)
 
         except Exception:
             traceback.print_exc()
-
-        time.sleep(config.LOOP_SLEEP_IN_MILLISEC / 1000)
+            time.sleep(config.LOOP_SLEEP_IN_MILLISEC / 1000)
 
 
 def poll_ui():
@@ -181,28 +272,23 @@ def poll_ui():
     if stop_event.is_set():
         return
 
-    while True:
-        try:
-            msg, payload = ui_queue.get_nowait()
-        except Exception:
-            break
+    for msg, payload, enqueued_at in ui_mailbox.take_all():
+        metrics.record_duration("ui_queue", time.perf_counter() - enqueued_at)
 
         try:
             if msg == "input_method_has_data":
                 if main_menu_window is not None:
                     main_menu_window.set_input_method_has_data(bool(payload))
 
-            elif msg == "unset_mouse_point":
-                if calibration_window is None:
-                    if main_menu_window is not None:
-                        main_menu_window.unset_mouse_point()
-                else:
-                    if calibration_window is not None and not in_calibration:
-                        calibration_window.unset_mouse_point()
-
             elif msg == "mouse_point":
                 pos = payload
                 if pos is None:
+                    if calibration_window is None:
+                        if main_menu_window is not None:
+                            main_menu_window.unset_mouse_point()
+                    else:
+                        if not in_calibration:
+                            calibration_window.unset_mouse_point()
                     continue
 
                 if calibration_window is not None:
@@ -214,9 +300,12 @@ def poll_ui():
                         main_menu_window.set_mouse_point(pos)
 
             elif msg == "output_method_push":
-                pos = payload
-                if output_method is not None and pos is not None:
-                    output_method.push(pos)
+                sample: GazeSample = payload
+                if output_method is not None and sample is not None:
+                    started_at = time.perf_counter()
+                    output_method.push_sample(sample)
+                    metrics.record_duration("output", time.perf_counter() - started_at)
+                    metrics.record_duration("end_to_end", time.monotonic() - sample.timestamp)
 
         except Exception:
             traceback.print_exc()
@@ -231,6 +320,7 @@ def on_close():
     if stop_event.is_set():
         return
     stop_event.set()
+    output_worker.stop()
 
     try:
         if input_method is not None:
@@ -356,29 +446,6 @@ def show_preparational_text(preparational_text: str, on_finish: Callable, end_ti
             calibration_window.after(250, show_preparational_text, preparational_text, on_finish, end_time)
 
 
-def scale_vector_to_screen(vector):
-    return ((vector[0] + 1) * 0.5 * monitor.width, (vector[1] - 1) * 0.5 * -monitor.height)
-
-
-def get_new_mouse_position(mouse_movement, last_mouse_position):
-    if mouse_movement.type == MouseMovementType.TO_POSITION:
-        new_mouse_position = scale_vector_to_screen(mouse_movement.vector)
-    if mouse_movement.type == MouseMovementType.BY:
-        new_mouse_position = [
-            last_mouse_position[0] + mouse_movement.vector[0] * config.MOUSE_SPEED_IN_PX,
-            last_mouse_position[1] - mouse_movement.vector[1] * config.MOUSE_SPEED_IN_PX,
-        ]
-        if new_mouse_position[0] < 0:
-            new_mouse_position[0] = 0
-        if new_mouse_position[0] > monitor.width:
-            new_mouse_position[0] = monitor.width
-        if new_mouse_position[1] < 0:
-            new_mouse_position[1] = 0
-        if new_mouse_position[1] > monitor.height:
-            new_mouse_position[1] = monitor.height
-    return new_mouse_position
-
-
 def execute_calibrations(
     calibration_instructions: Iterator,
     on_finish: Callable,
@@ -410,7 +477,7 @@ def execute_calibration(calibration_instruction: CalibrationInstruction, on_fini
     image = calibration_instruction.image
 
     if vector is not None:
-        calibration_window.set_calibration_point(scale_vector_to_screen(vector))
+        calibration_window.set_calibration_point(scale_vector_to_screen(vector, monitor.width, monitor.height))
     if text is not None:
         calibration_window.set_main_text(text)
     if image is not None:
@@ -449,7 +516,9 @@ def collect_calibration_vectors(
         remaining_seconds = int((end_time - now).total_seconds())
 
         if vector is not None:
-            calibration_window.set_calibration_point(scale_vector_to_screen(vector), str(remaining_seconds))
+            calibration_window.set_calibration_point(
+                scale_vector_to_screen(vector, monitor.width, monitor.height), str(remaining_seconds)
+            )
         elif text is not None:
             calibration_window.set_main_text(text + f" ... {remaining_seconds}")
         else:
@@ -465,55 +534,92 @@ def collect_calibration_vectors(
         )
 
 
-main_menu_window = MainMenuWindow()
-root_window = main_menu_window.get_window()
-show_release_notes_if_needed(root_window)
-root_window.protocol("WM_DELETE_WINDOW", on_close)
-root_window.after(0, poll_ui)
+# Detectors of the camera based inputs can run in processes which are spawned from this module,
+# so nothing may start when it is imported by them.
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
 
-reload_input_method(args.input_method, root_window)
-reload_tracking_approach(args.tracking_approach)
-reload_output_method(args.output_method, root_window)
-reload_calibration_result()
+    if getattr(sys, "frozen", False):
+        import pyi_splash
+        pyi_splash.close()
 
-main_menu_window.set_input_method_options(input_methods)
-main_menu_window.set_current_input_method(selected_input_method)
-main_menu_window.on_input_method_change_requested(
-    lambda new_input_method: (reload_input_method(new_input_method, root_window), reload_calibration_result())
-)
+    args = parser.parse_args()
+    config.VIDEO_SOURCE = args.video_source
+    config.DETECT_IN_SEPARATE_PROCESS = args.detect_in_separate_process
+    config.REPLAY_FILE = args.replay_file
+    config.REPLAY_SPEED = args.replay_speed
 
-main_menu_window.set_tracking_approach_options(tracking_approaches)
-main_menu_window.set_current_tracking_approach(selected_tracking_approach)
-main_menu_window.on_tracking_approach_change_requested(
-    lambda new_tracking_approach: (reload_tracking_approach(new_tracking_approach), reload_calibration_result())
-)
+    setup_logging(args)
+    logger.info(f"{config.APP_FULL_NAME} {config.APP_VERSION}")
+    logger.info(f"imported the main modules in {time.perf_counter() - started_at:.2f}s")
 
-main_menu_window.set_output_method_options(output_methods)
-main_menu_window.set_current_output_method(selected_output_method)
-main_menu_window.on_output_method_change_requested(
-    lambda new_output_method: reload_output_method(new_output_method, root_window)
-)
+    monitor = screeninfo.get_monitors()[0]
+    last_mouse_position = [monitor.width / 2, monitor.height / 2]
+    recorder = SampleRecorder(args.record) if args.record else None
+
+    main_menu_window = MainMenuWindow()
+    root_window = main_menu_window.get_window()
+    show_release_notes_if_needed(root_window)
+    root_window.protocol("WM_DELETE_WINDOW", on_close)
+    root_window.after(0, poll_ui)
+    output_worker.start()
+
+    reload_input_method(args.input_method, root_window)
+    reload_tracking_approach(args.tracking_approach)
+    reload_output_method(args.output_method, root_window)
+    reload_calibration_result()
+
+    main_menu_window.set_input_method_options(input_methods)
+    main_menu_window.set_current_input_method(selected_input_method)
+    main_menu_window.on_input_method_change_requested(
+        lambda new_input_method: (reload_input_method(new_input_method, root_window), reload_calibration_result())
+    )
 
-main_menu_window.on_calibration_requested(on_calibration_requested)
+    main_menu_window.set_tracking_approach_options(tracking_approaches)
+    main_menu_window.set_current_tracking_approach(selected_tracking_approach)
+    main_menu_window.on_tracking_approach_change_requested(
+        lambda new_tracking_approach: (reload_tracking_approach(new_tracking_approach), reload_calibration_result())
+    )
 
-request_loop = Thread(target=loop, daemon=True)
-request_loop.start()
+    main_menu_window.set_output_method_options(output_methods)
+    main_menu_window.set_current_output_method(selected_output_method)
+    main_menu_window.on_output_method_change_requested(
+        lambda new_output_method: reload_output_method(new_output_method, root_window)
+    )
 
-main_menu_window.mainloop()
+    main_menu_window.on_calibration_requested(on_calibration_requested)
 
-stop_event.set()
-request_loop.join(timeout=1)
+    metrics_reporter = None
+    if args.metrics:
+        metrics_reporter = MetricsReporter(metrics, args.metrics, config.METRICS_INTERVAL_IN_SEC)
+        metrics_reporter.start()
 
-try:
-    if input_method is not None:
-        input_method.stop()
-except Exception:
-    traceback.print_exc()
+    request_loop = Thread(target=loop, daemon=True)
+    request_loop.start()
 
-try:
-    if output_method is not None:
-        output_method.stop()
-except Exception:
-    traceback.print_exc()
+    root_window.after_idle(lambda: logger.info(f"started in {time.perf_counter() - started_at:.2f}s"))
+    main_menu_window.mainloop()
+
+    stop_event.set()
+    request_loop.join(timeout=1)
+    output_worker.stop()
+
+    if recorder is not None:
+        recorder.close()
+
+    try:
+        if input_method is not None:
+            input_method.stop()
+    except Exception:
+        traceback.print_exc()
+
+    try:
+        if output_method is not None:
+            output_method.stop()
+    except Exception:
+        traceback.print_exc()
+
+    if metrics_reporter is not None:
+        metrics_reporter.stop()
 
-logger.info("bye")
+    logger.info("bye")
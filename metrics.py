@@ -0,0 +1,195 @@
+import json
+import socket
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import logging
+
+
+class LatencyHistogram:
+    """Keeps the most recent durations of a stage to compute percentiles from."""
+
+    def __init__(self, max_samples=2000):
+        self._durations = deque(maxlen=max_samples)
+
+    def add(self, seconds: float) -> None:
+        self._durations.append(seconds)
+
+    def snapshot(self) -> dict:
+        durations = sorted(self._durations)
+        if not durations:
+            return {"count": 0}
+
+        def percentile(p):
+            return durations[round(p / 100 * (len(durations) - 1))] * 1000
+
+        return {
+            "count": len(durations),
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+            "p99_ms": percentile(99),
+            "max_ms": durations[-1] * 1000,
+        }
+
+
+class Metrics:
+    """Collects durations per pipeline stage, counters and gauges.
+    Does nothing until it is enabled, so it can stay in the hot path."""
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._counters: dict[str, int] = {}
+        self._gauges: dict[str, float] = {}
+        self._last_snapshot_at = time.monotonic()
+        self._last_snapshot_counters: dict[str, int] = {}
+
+    def record_duration(self, stage: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = LatencyHistogram()
+            histogram.add(seconds)
+
+    def increment(self, counter: str, by: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + by
+
+    def set_gauge(self, gauge: str, value: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[gauge] = value
+
+    def snapshot(self) -> dict:
+        """Returns all metrics. Counters are also given as rate per second since the last snapshot."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = max(now - self._last_snapshot_at, 1e-9)
+            rates = {
+                f"{name}_per_sec": (value - self._last_snapshot_counters.get(name, 0)) / elapsed
+                for name, value in self._counters.items()
+            }
+            self._last_snapshot_at = now
+            self._last_snapshot_counters = dict(self._counters)
+            return {
+                "time": time.time(),
+                "stages": {name: histogram.snapshot() for name, histogram in self._histograms.items()},
+                "counters": dict(self._counters),
+                "rates": rates,
+                "gauges": dict(self._gauges),
+            }
+
+
+metrics = Metrics()
+
+
+def parse_metrics_target(target: str):
+    """Parses a target of MetricsReporter into its kind and address:
+    the path for "file", (host, port) for "udp" and the port for "http".
+    Raises a ValueError if the target is invalid."""
+    kind, _, address = target.partition(":")
+    try:
+        if kind == "file" and address:
+            return kind, address
+        if kind == "udp":
+            host, _, port = address.rpartition(":")
+            return kind, (host or "127.0.0.1", _parse_port(port))
+        if kind == "http":
+            return kind, _parse_port(address)
+    except ValueError:
+        pass
+    raise ValueError(f'invalid metrics target "{target}", expected file:PATH, udp:HOST:PORT or http:PORT')
+
+
+def _parse_port(value: str) -> int:
+    port = int(value)
+    if not 0 < port < 65536:
+        raise ValueError(f"invalid port {port}")
+    return port
+
+
+class MetricsReporter:
+    """Periodically publishes snapshots of the Metrics.
+
+    The target is one of:
+    - `file:PATH` appends one JSON line per snapshot to the file,
+    - `udp:HOST:PORT` sends every snapshot as JSON datagram,
+    - `http:PORT` serves the latest snapshot as JSON on http://127.0.0.1:PORT/"""
+
+    def __init__(self, metrics: Metrics, target: str, interval_in_sec: float):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.metrics = metrics
+        self.interval_in_sec = interval_in_sec
+        self.target = target
+        self.kind, self.address = parse_metrics_target(target)
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sock: Optional[socket.socket] = None
+        self._http_server: Optional[ThreadingHTTPServer] = None
+        self._latest_snapshot = b"{}"
+
+    def start(self):
+        self.metrics.enabled = True
+        if self.kind == "udp":
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        elif self.kind == "http":
+            self._http_server = ThreadingHTTPServer(("127.0.0.1", self.address), self._http_handler())
+            threading.Thread(target=self._http_server.serve_forever, daemon=True).start()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.logger.info(f"reporting metrics to {self.target}")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self._publish()
+        if self._sock is not None:
+            self._sock.close()
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval_in_sec):
+            self._publish()
+
+    def _publish(self):
+        try:
+            snapshot = json.dumps(self.metrics.snapshot()).encode()
+            if self.kind == "file":
+                with open(self.address, "ab") as f:
+                    f.write(snapshot + b"\n")
+            elif self.kind == "udp":
+                self._sock.sendto(snapshot, self.address)
+            else:
+                self._latest_snapshot = snapshot
+        except Exception:
+            self.logger.exception("could not publish metrics")
+
+    def _http_handler(self):
+        reporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = reporter._latest_snapshot
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -1,13 +1,16 @@
-import pyttsx3
+import importlib
 import threading
 import tempfile
 import subprocess
 import shutil
 import os
 import sys
+import time
 
 import numpy as np
 
+import logging
+
 Vector = tuple[float, float]
 
 
@@ -20,6 +23,42 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+class LazyClass:
+    """A class that is only imported when it's used, given as "module:ClassName".
+    Calling it creates an instance, just like calling the class.
+
+    The modules in `preload` are imported first, for libraries that have to be loaded in a certain order."""
+
+    def __init__(self, path: str, preload: tuple[str, ...] = ()):
+        self.path = path
+        self.preload = preload
+        self._class = None
+
+    def load(self):
+        if self._class is None:
+            started_at = time.perf_counter()
+            for module_name in self.preload:
+                importlib.import_module(module_name)
+            module_name, class_name = self.path.split(":")
+            self._class = getattr(importlib.import_module(module_name), class_name)
+            logging.getLogger(self.__class__.__name__).info(
+                f"imported {self.path} in {time.perf_counter() - started_at:.2f}s"
+            )
+        return self._class
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+
+def parse_video_source(value):
+    """A camera index, or the path of a video file. Returns None for "None" or an empty value."""
+    if value is None or value == "None" or value == "":
+        return None
+    if isinstance(value, int) or str(value).isdigit():
+        return int(value)
+    return str(value)
+
+
 def rotate_yaw_pitch_roll(yaw, pitch, roll):
     yaw = yaw * np.pi / 180.0
     pitch = pitch * np.pi / 180.0
@@ -50,8 +89,37 @@ def rotate_yaw_pitch_roll(yaw, pitch, roll):
     return Rr * Rp * Ry
 
 
+class DataSignal:
+    """Tells a single consumer that a producer has published new data.
+
+    Producers (e.g. the capture thread of a client) call `notify()` after they
+    updated their latest data. The consumer blocks in `wait()` until there is
+    data it hasn't seen yet, instead of polling in a fixed interval."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._produced = 0
+        self._consumed = 0
+
+    def notify(self) -> None:
+        with self._condition:
+            self._produced += 1
+            self._condition.notify_all()
+
+    def wait(self, timeout_in_sec: float) -> bool:
+        """Waits for new data. Returns True if new data was published since the
+        last call, or False if the timeout was hit."""
+        with self._condition:
+            has_new_data = self._condition.wait_for(lambda: self._produced != self._consumed, timeout_in_sec)
+            self._consumed = self._produced
+            return has_new_data
+
+
 class TTS:
     def __init__(self, lang: str = "en"):
+        # pyttsx3 takes a while to import, and is only needed for the TTS keyboard
+        import pyttsx3
+
         self.lang = lang
         self.engine = pyttsx3.init()
 
@@ -1,4 +1,8 @@
 from enum import Enum
+from typing import Optional
+
+import config
+from gaze_sample import GazeSample
 from misc import Vector
 
 
@@ -8,6 +12,34 @@ class MouseMovementType(Enum):
 
 
 class MouseMovement:
-    def __init__(self, mouse_movement_type: MouseMovementType, vector: Vector):
+    def __init__(self, mouse_movement_type: MouseMovementType, vector: Vector, sample: Optional[GazeSample] = None):
         self.type = mouse_movement_type
         self.vector = vector
+        # the GazeSample this movement was derived from, if known
+        self.sample = sample
+
+
+def scale_vector_to_screen(vector: Vector, screen_width: float, screen_height: float) -> Vector:
+    """Scales a vector with a value range of -1.0<=x<=1.0 and 1.0>=y>=-1.0 to screen coordinates."""
+    return ((vector[0] + 1) * 0.5 * screen_width, (vector[1] - 1) * 0.5 * -screen_height)
+
+
+def get_new_mouse_position(mouse_movement, last_mouse_position, elapsed_in_sec, screen_width, screen_height):
+    if mouse_movement.type == MouseMovementType.TO_POSITION:
+        new_mouse_position = scale_vector_to_screen(mouse_movement.vector, screen_width, screen_height)
+    if mouse_movement.type == MouseMovementType.BY:
+        # the speed is independent of how often the input method delivers samples
+        distance_in_px = config.MOUSE_SPEED_IN_PX_PER_SEC * elapsed_in_sec
+        new_mouse_position = [
+            last_mouse_position[0] + mouse_movement.vector[0] * distance_in_px,
+            last_mouse_position[1] - mouse_movement.vector[1] * distance_in_px,
+        ]
+        if new_mouse_position[0] < 0:
+            new_mouse_position[0] = 0
+        if new_mouse_position[0] > screen_width:
+            new_mouse_position[0] = screen_width
+        if new_mouse_position[1] < 0:
+            new_mouse_position[1] = 0
+        if new_mouse_position[1] > screen_height:
+            new_mouse_position[1] = screen_height
+    return new_mouse_position
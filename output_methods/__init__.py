@@ -1,8 +1,7 @@
-from output_methods.udp_output_method import UdpOutputMethod
-from misc import resource_path
 from guis.tkinter.main_menu_window import MainMenuOption
-from output_methods.mouse_output_method import MouseOutputMethod
-from output_methods.tts_keyboard_output_method import TtsKeyboardOutputMethod
+from misc import LazyClass, resource_path
+
+# the output methods are only imported when they're selected
 
 output_methods: dict[MainMenuOption] = {
     "udp": MainMenuOption(
@@ -10,20 +9,41 @@ output_methods: dict[MainMenuOption] = {
         title="UDP-Export",
         description="Publish the gaze results over UDP in a simple JSON format.",
         icon=resource_path("assets/output_method_udp.png"),
-        clazz=UdpOutputMethod,
+        clazz=LazyClass("output_methods.udp_output_method:UdpOutputMethod"),
+    ),
+    "udp-binary": MainMenuOption(
+        key="udp-binary",
+        title="UDP-Export (binary)",
+        description="Publish the gaze results over UDP in a compact binary format.",
+        icon=resource_path("assets/output_method_udp.png"),
+        clazz=LazyClass("output_methods.udp_output_method:UdpBinaryOutputMethod"),
+    ),
+    "udp-fan-out": MainMenuOption(
+        key="udp-fan-out",
+        title="UDP-Export (fan-out)",
+        description="Publish the gaze results over UDP\nto every application that subscribed.",
+        icon=resource_path("assets/output_method_udp.png"),
+        clazz=LazyClass("output_methods.udp_fan_out_output_method:UdpFanOutOutputMethod"),
+    ),
+    "shared-memory": MainMenuOption(
+        key="shared-memory",
+        title="Shared Memory",
+        description="Write the gaze results into a ring buffer in shared memory\nfor applications on the same machine.",
+        icon=resource_path("assets/output_method_udp.png"),
+        clazz=LazyClass("output_methods.shared_memory_output_method:SharedMemoryOutputMethod"),
     ),
     "mouse": MainMenuOption(
         key="mouse",
         title="Mouse Movement",
         description="Moves the mouse cursor according to the gaze.\nDoesn't work with the Mouse input.",
         icon=resource_path("assets/output_method_mouse.png"),
-        clazz=MouseOutputMethod,
+        clazz=LazyClass("output_methods.mouse_output_method:MouseOutputMethod"),
     ),
     "tts-keyboard": MainMenuOption(
         key="tts-keyboard",
         title="TTS Keyboard",
         description="A text-to-speech-keyboard.\n(Proove-of-concept)",
         icon=resource_path("assets/output_method_tts-keyboard.png"),
-        clazz=TtsKeyboardOutputMethod,
+        clazz=LazyClass("output_methods.tts_keyboard_output_method:TtsKeyboardOutputMethod"),
     ),
 }
@@ -10,6 +10,8 @@ class MouseOutputMethod(OutputMethod):
     """Moves the Mouse to the given Vector.
     When the mouse is moved manually this output_method pauses for some time."""
 
+    needs_ui_thread = False
+
     def __init__(self, root_window):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.manually_moved_to = None
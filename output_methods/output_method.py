@@ -1,4 +1,7 @@
 from abc import ABC, abstractmethod
+from typing import Optional
+
+from gaze_sample import GazeSample
 from misc import Vector
 
 
@@ -7,6 +10,10 @@ class OutputMethod(ABC):
     This method could be a simple `print` to the CLI
     or pushing the vector to a message queue."""
 
+    # Whether `push` has to be called on the Tk thread, e.g. because it draws onto a window.
+    # OutputMethods that don't touch Tk set this to False, so they are pushed to from an OutputWorker.
+    needs_ui_thread = True
+
     @abstractmethod
     def start(self):
         """Starts the OutputMethod."""
@@ -21,3 +28,17 @@ class OutputMethod(ABC):
     def push(self, vector: Vector):
         """pushes the vector to the output method."""
         pass
+
+    def push_sample(self, sample: GazeSample):
+        """pushes the vector of the GazeSample to the output method.
+        OutputMethods that make use of the sample's timestamp or sequence should override this."""
+        self.push(sample.vector)
+
+    def get_flush_delay(self) -> Optional[float]:
+        """Seconds until `flush` should be called for data held back by `push_sample`, or None if nothing is held back.
+        Only called from an OutputWorker, so only OutputMethods with `needs_ui_thread = False` can hold data back."""
+        return None
+
+    def flush(self):
+        """Sends the data held back by `push_sample`."""
+        pass
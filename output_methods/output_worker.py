@@ -0,0 +1,89 @@
+import threading
+import time
+from typing import Optional
+
+from gaze_sample import GazeSample
+from metrics import metrics
+from output_methods.output_method import OutputMethod
+
+import logging
+
+
+class OutputWorker:
+    """Pushes GazeSamples to an OutputMethod on a dedicated thread, so OutputMethods which
+    don't need the Tk thread are neither slowed down by it nor slow down the gaze loop.
+
+    Only the latest submitted sample is kept. If the OutputMethod is slower than the input,
+    older samples are replaced and counted as `output_coalesced` in the metrics.
+    If the OutputMethod holds data back, e.g. to batch it, it's flushed once its flush delay is over,
+    even if no further sample is submitted."""
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._condition = threading.Condition()
+        self._push_lock = threading.Lock()
+        self._output_method: Optional[OutputMethod] = None
+        self._sample: Optional[GazeSample] = None
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.logger.info("started")
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self.logger.info("stopped")
+
+    def set_output_method(self, output_method: Optional[OutputMethod]):
+        """Sets the OutputMethod to push to, or None to push to nothing.
+        Waits for a running push to finish, so the previous OutputMethod can be stopped safely afterwards."""
+        with self._push_lock:
+            with self._condition:
+                self._output_method = output_method
+                self._sample = None
+
+    def submit(self, sample: GazeSample) -> bool:
+        """Submits a sample to be pushed. Returns False if there is no OutputMethod to push to."""
+        with self._condition:
+            if self._output_method is None or not self._running:
+                return False
+            if self._sample is not None:
+                metrics.increment("output_coalesced")
+            self._sample = sample
+            self._condition.notify()
+            return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                flush_delay = None if self._output_method is None else self._output_method.get_flush_delay()
+                self._condition.wait_for(lambda: self._sample is not None or not self._running, flush_delay)
+                if not self._running:
+                    return
+                sample = self._sample
+                self._sample = None
+
+            with self._push_lock:
+                output_method = self._output_method
+                if output_method is None:
+                    continue
+                try:
+                    if sample is None:
+                        # the flush delay is over
+                        output_method.flush()
+                        continue
+                    started_at = time.perf_counter()
+                    output_method.push_sample(sample)
+                    metrics.record_duration("output", time.perf_counter() - started_at)
+                    metrics.record_duration("end_to_end", time.monotonic() - sample.timestamp)
+                except Exception:
+                    self.logger.exception("could not push sample")
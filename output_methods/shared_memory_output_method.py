@@ -0,0 +1,52 @@
+import time
+
+import config
+from gaze_sample import GazeSample
+from misc import Vector
+from output_methods.output_method import OutputMethod
+from output_methods.shared_memory_ring_buffer import SharedMemoryRingWriter
+
+import logging
+
+
+class SharedMemoryOutputMethod(OutputMethod):
+    """Writes the vectors into a ring buffer in shared memory.
+    Applications on the same machine can read it with `shared_memory_ring_buffer.SharedMemoryRingReader`."""
+
+    needs_ui_thread = False
+
+    def __init__(self, root_window, name=None, capacity=None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.name = name if name is not None else config.SHARED_MEMORY_NAME
+        self.capacity = capacity if capacity is not None else config.SHARED_MEMORY_CAPACITY
+        self.writer = None
+        self.logger.info("initialized")
+
+    def start(self):
+        try:
+            self.writer = SharedMemoryRingWriter(self.name, self.capacity)
+        except FileExistsError:
+            self.logger.exception("could not start, nothing will be written")
+            return
+        self.logger.info(f'started, writing to shared memory "{self.name}"')
+
+    def stop(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        self.logger.info("stopped")
+
+    def push(self, vector: Vector):
+        self.push_sample(GazeSample(tuple(vector), time.monotonic(), 0))
+
+    def push_sample(self, sample: GazeSample):
+        if self.writer is None:
+            return
+        self.writer.write(
+            sample.vector[0],
+            sample.vector[1],
+            int(sample.timestamp * 1_000_000_000),
+            sample.sequence,
+            sample.confidence,
+        )
+        self.logger.debug(f"pushed sample: {sample}")
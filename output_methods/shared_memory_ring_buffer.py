@@ -0,0 +1,165 @@
+"""A ring buffer of gaze records in shared memory, for consumers on the same machine.
+
+This module only depends on the standard library, so other applications can copy it to read the stream:
+
+    reader = SharedMemoryRingReader()
+    while True:
+        for record in reader.read_new():
+            print(record.x, record.y)
+
+Layout, all little-endian:
+- header: magic b"MIRS", version, record size, capacity, number of records written so far
+- `capacity` records: seqlock counter, x, y, capture time in monotonic nanoseconds, sequence,
+  confidence (NaN if unknown)
+
+A record's seqlock counter is odd while the record is written. Readers retry if the counter is
+odd or changed while they read the record, so they never see a half-written record.
+Every write adds 2 to the counter, so after the n-th record written into a slot it's 2n. That tells readers
+whether the slot still holds the record they want, or was overwritten by the writer lapping them."""
+
+import math
+import struct
+import sys
+from multiprocessing import shared_memory
+from typing import Iterator, NamedTuple, Optional
+
+HEADER = struct.Struct("<4sHHIQ")
+MAGIC = b"MIRS"
+VERSION = 1
+WRITE_COUNT_OFFSET = 12
+WRITE_COUNT = struct.Struct("<Q")
+
+RECORD = struct.Struct("<QddqQd")
+SEQLOCK = struct.Struct("<Q")
+RECORD_FIELDS = struct.Struct("<ddqQd")
+
+DEFAULT_NAME = "miranda_gaze"
+
+
+class RingRecord(NamedTuple):
+    x: float
+    y: float
+    timestamp_ns: int
+    sequence: int
+    confidence: Optional[float]
+
+
+class SharedMemoryRingWriter:
+    """Creates the shared memory and writes records into it. There must only be one writer."""
+
+    def __init__(self, name: str = DEFAULT_NAME, capacity: int = 1024):
+        self.name = name
+        self.capacity = capacity
+        size = HEADER.size + RECORD.size * capacity
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # it may belong to another writer, so it's not removed
+            raise FileExistsError(f'shared memory "{name}" already exists, another writer may be using it') from None
+        self._buf = self._shm.buf
+        self._write_count = 0
+        HEADER.pack_into(self._buf, 0, MAGIC, VERSION, RECORD.size, capacity, 0)
+
+    def write(self, x: float, y: float, timestamp_ns: int, sequence: int, confidence: Optional[float] = None):
+        offset = HEADER.size + (self._write_count % self.capacity) * RECORD.size
+        lock = SEQLOCK.unpack_from(self._buf, offset)[0]
+        SEQLOCK.pack_into(self._buf, offset, lock + 1)
+        RECORD_FIELDS.pack_into(
+            self._buf,
+            offset + SEQLOCK.size,
+            x,
+            y,
+            timestamp_ns,
+            sequence,
+            math.nan if confidence is None else confidence,
+        )
+        SEQLOCK.pack_into(self._buf, offset, lock + 2)
+        self._write_count += 1
+        WRITE_COUNT.pack_into(self._buf, WRITE_COUNT_OFFSET, self._write_count)
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        self._shm.unlink()
+
+
+class SharedMemoryRingReader:
+    """Attaches to the shared memory of a SharedMemoryRingWriter and reads its records.
+    Records that were overwritten before they were read are counted in `dropped`."""
+
+    def __init__(self, name: str = DEFAULT_NAME, max_retries: int = 100):
+        self._shm = attach_shared_memory(name)
+        self._buf = self._shm.buf
+        self.max_retries = max_retries
+        magic, version, record_size, capacity, _ = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise ValueError(f'shared memory "{name}" is not a gaze ring buffer of version {VERSION}')
+        self.capacity = capacity
+        self.dropped = 0
+        self._read_count = self._get_write_count()
+
+    def read_latest(self) -> Optional[RingRecord]:
+        """Returns the newest record, or None if nothing has been written yet."""
+        write_count = self._get_write_count()
+        if write_count == 0:
+            return None
+        return self._read_record(write_count - 1)
+
+    def read_new(self) -> Iterator[RingRecord]:
+        """Yields all records written since the last call, oldest first."""
+        write_count = self._get_write_count()
+        if write_count - self._read_count > self.capacity:
+            self.dropped += write_count - self._read_count - self.capacity
+            self._read_count = write_count - self.capacity
+        while self._read_count < write_count:
+            record = self._read_record(self._read_count)
+            self._read_count += 1
+            if record is None:
+                # overwritten while it was read
+                self.dropped += 1
+            else:
+                yield record
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+
+    def _get_write_count(self) -> int:
+        return WRITE_COUNT.unpack_from(self._buf, WRITE_COUNT_OFFSET)[0]
+
+    def _read_record(self, index: int) -> Optional[RingRecord]:
+        """Returns None if the record was overwritten, or kept being written for `max_retries`."""
+        offset = HEADER.size + (index % self.capacity) * RECORD.size
+        expected_lock = 2 * (index // self.capacity + 1)
+        for _ in range(self.max_retries):
+            lock_before = SEQLOCK.unpack_from(self._buf, offset)[0]
+            if lock_before > expected_lock:
+                return None
+            if lock_before != expected_lock:
+                continue
+            x, y, timestamp_ns, sequence, confidence = RECORD_FIELDS.unpack_from(self._buf, offset + SEQLOCK.size)
+            if SEQLOCK.unpack_from(self._buf, offset)[0] == lock_before:
+                return RingRecord(x, y, timestamp_ns, sequence, None if math.isnan(confidence) else confidence)
+        return None
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attaches to the shared memory of another process, without taking over its cleanup."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    if sys.platform == "win32":
+        return shared_memory.SharedMemory(name=name)
+
+    from multiprocessing import resource_tracker
+
+    # a process spawned by the owner uses the owner's resource tracker, there the registration is the owner's own
+    tracker = resource_tracker._resource_tracker
+    shares_resource_tracker = tracker._fd is not None and tracker._pid is None
+    shm = shared_memory.SharedMemory(name=name)
+    if not shares_resource_tracker:
+        # otherwise the resource tracker unlinks the owner's memory when this process exits
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
@@ -0,0 +1,165 @@
+import select
+import socket
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import config
+from gaze_sample import GazeSample
+from metrics import metrics
+from output_methods.udp_output_method import WIRE_FORMAT_BINARY, WIRE_FORMAT_JSON, UdpOutputMethod
+
+import logging
+
+
+SUBSCRIBE = b"SUBSCRIBE"
+UNSUBSCRIBE = b"UNSUBSCRIBE"
+SUBSCRIBED = b"SUBSCRIBED"
+UNSUBSCRIBED = b"UNSUBSCRIBED"
+
+
+class UdpSubscriber:
+    """A consumer of the UDP fan-out, with its own buffer of datagrams that couldn't be sent yet.
+    When the buffer is full, the oldest datagram is dropped."""
+
+    def __init__(self, address, wire_format: str, buffer_size: int):
+        self.address = address
+        self.wire_format = wire_format
+        self.pending: deque[bytes] = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.last_seen = time.monotonic()
+
+
+class UdpFanOutOutputMethod(UdpOutputMethod):
+    """Pushes the vectors over UDP to every consumer that registered itself.
+
+    To register, a consumer sends `SUBSCRIBE` (or `SUBSCRIBE json` / `SUBSCRIBE binary`) to
+    UDP_FAN_OUT_PORT from the socket it wants to receive the stream on, and gets `SUBSCRIBED` back.
+    The registration has to be repeated at least every UDP_SUBSCRIPTION_TIMEOUT_IN_SEC.
+    `UNSUBSCRIBE` ends the subscription right away.
+
+    Every subscriber has its own send buffer. If a datagram can't be sent to one subscriber,
+    it is kept in its buffer instead of stalling the others."""
+
+    def __init__(self, root_window, host="127.0.0.1", port=None, batch_size=1):
+        super().__init__(
+            root_window,
+            host,
+            port if port is not None else config.UDP_FAN_OUT_PORT,
+            wire_format=WIRE_FORMAT_JSON,
+            batch_size=batch_size,
+        )
+        self._subscribers: dict[tuple, UdpSubscriber] = {}
+        self._subscribers_lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(self.server_address)
+        self.sock.setblocking(False)
+        self._running = True
+        self._thread = threading.Thread(target=self._handle_registrations, daemon=True)
+        self._thread.start()
+        self.logger.info(f"started, waiting for subscribers on {self.server_address}")
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        with self._subscribers_lock:
+            self._subscribers.clear()
+        super().stop()
+
+    def get_subscribers(self) -> list[UdpSubscriber]:
+        with self._subscribers_lock:
+            return list(self._subscribers.values())
+
+    def flush(self):
+        if not self._batch:
+            return
+        batch = self._batch
+        self._batch = []
+
+        # every wire format is only encoded once, and only if someone subscribed to it
+        datagrams = {}
+        now = time.monotonic()
+        for subscriber in self.get_subscribers():
+            if now - subscriber.last_seen > config.UDP_SUBSCRIPTION_TIMEOUT_IN_SEC:
+                self._unsubscribe(subscriber.address, reason="timed out")
+                continue
+            datagram = datagrams.get(subscriber.wire_format)
+            if datagram is None:
+                datagram = datagrams[subscriber.wire_format] = self._encode(batch, subscriber.wire_format)
+            self._send_to(subscriber, datagram)
+
+    def _send_to(self, subscriber: UdpSubscriber, datagram: bytes):
+        if len(subscriber.pending) == subscriber.pending.maxlen:
+            subscriber.dropped += 1
+            metrics.increment("udp_subscriber_dropped")
+        subscriber.pending.append(datagram)
+
+        while subscriber.pending:
+            try:
+                self.sock.sendto(subscriber.pending[0], subscriber.address)
+            except (BlockingIOError, InterruptedError):
+                # try again with the next datagram
+                return
+            except OSError as e:
+                self._unsubscribe(subscriber.address, reason=str(e))
+                return
+            subscriber.pending.popleft()
+
+    def _handle_registrations(self):
+        while self._running:
+            try:
+                readable, _, _ = select.select([self.sock], [], [], 0.2)
+                if not readable:
+                    continue
+                message, address = self.sock.recvfrom(64)
+            except (BlockingIOError, InterruptedError, ConnectionResetError):
+                # Windows reports unreachable subscribers as ConnectionResetError on receive
+                continue
+            except OSError:
+                if self._running:
+                    self.logger.exception("registration failed")
+                continue
+
+            command, _, wire_format = message.strip().partition(b" ")
+            if command == SUBSCRIBE:
+                wire_format = wire_format.decode(errors="replace") or WIRE_FORMAT_JSON
+                if wire_format not in (WIRE_FORMAT_JSON, WIRE_FORMAT_BINARY):
+                    continue
+                self._subscribe(address, wire_format)
+                self._reply(SUBSCRIBED, address)
+            elif command == UNSUBSCRIBE:
+                self._unsubscribe(address, reason="unsubscribed")
+                self._reply(UNSUBSCRIBED, address)
+
+    def _subscribe(self, address, wire_format: str):
+        with self._subscribers_lock:
+            subscriber = self._subscribers.get(address)
+            if subscriber is None or subscriber.wire_format != wire_format:
+                self._subscribers[address] = UdpSubscriber(address, wire_format, config.UDP_SUBSCRIBER_BUFFER_SIZE)
+                self.logger.info(f"subscribed {address} ({wire_format})")
+            else:
+                subscriber.last_seen = time.monotonic()
+
+    def _unsubscribe(self, address, reason: str):
+        with self._subscribers_lock:
+            subscriber = self._subscribers.pop(address, None)
+        if subscriber is not None:
+            self.logger.info(f"unsubscribed {address}: {reason}, dropped {subscriber.dropped} datagrams")
+
+    def _reply(self, reply: bytes, address):
+        try:
+            self.sock.sendto(reply, address)
+        except OSError:
+            pass
+
+    def push_sample(self, sample: GazeSample):
+        if not self._subscribers:
+            self._batch.clear()
+            return
+        super().push_sample(sample)
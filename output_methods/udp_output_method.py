@@ -1,20 +1,51 @@
 import json
 import socket
-from datetime import datetime
+import struct
+import time
+from datetime import datetime, timedelta
+from typing import Optional
 
+import config
+from gaze_sample import GazeSample
 from output_methods.output_method import OutputMethod
 from misc import Vector
 
 import logging
 
 
+WIRE_FORMAT_JSON = "json"
+WIRE_FORMAT_BINARY = "binary"
+
+# A binary datagram is a header followed by `count` records, all little-endian.
+# header: magic b"MIRA", format version, reserved byte, record count
+BINARY_HEADER = struct.Struct("<4sBBH")
+BINARY_MAGIC = b"MIRA"
+BINARY_VERSION = 1
+# record: x, y, capture time in nanoseconds of the monotonic clock, sequence
+BINARY_RECORD = struct.Struct("<ddqQ")
+
+
 class UdpOutputMethod(OutputMethod):
-    """Pushes the vector as JSON objects over UDP"""
+    """Pushes the vector as JSON objects over UDP.
 
-    def __init__(self, root_window, host="127.0.0.1", port=9999):
+    With the binary wire format, every sample is packed as fixed-size BINARY_RECORD instead.
+    With a batch size greater than 1, several samples are sent per datagram: as a JSON list,
+    or as consecutive binary records. A batch is sent once it is full, or UDP_BATCH_MAX_DELAY_IN_MILLISEC
+    after its first sample, when the OutputWorker calls `flush`."""
+
+    needs_ui_thread = False
+
+    def __init__(self, root_window, host="127.0.0.1", port=9999, wire_format=WIRE_FORMAT_JSON, batch_size=1):
         self.logger = logging.getLogger(self.__class__.__name__)
+        if wire_format not in (WIRE_FORMAT_JSON, WIRE_FORMAT_BINARY):
+            raise ValueError(f'unknown wire format "{wire_format}"')
         self.sock = None
         self.server_address = (host, port)
+        self.wire_format = wire_format
+        self.batch_size = max(1, batch_size)
+        self.batch_max_delay_in_sec = config.UDP_BATCH_MAX_DELAY_IN_MILLISEC / 1000
+        self._batch: list[GazeSample] = []
+        self._batch_started_at = 0.0
         self.logger.info("initialized")
 
     def start(self):
@@ -22,11 +53,83 @@ class UdpOutputMethod(OutputMethod):
         self.logger.info("started")
 
     def stop(self):
+        self.flush()
         self.sock.close()
         self.logger.info("stopped")
 
     def push(self, vector: Vector):
-        message = {"x": vector[0], "y": vector[1], "timestamp": str(datetime.now())}
-        json_message = json.dumps(message)
-        self.sock.sendto(json_message.encode(), self.server_address)
-        self.logger.debug(f"pushed vector: {vector}")
+        self.push_sample(GazeSample(tuple(vector), time.monotonic(), 0))
+
+    def push_sample(self, sample: GazeSample):
+        now = time.monotonic()
+        if not self._batch:
+            self._batch_started_at = now
+        self._batch.append(sample)
+        if len(self._batch) >= self.batch_size or now - self._batch_started_at >= self.batch_max_delay_in_sec:
+            self.flush()
+        self.logger.debug(f"pushed sample: {sample}")
+
+    def get_flush_delay(self) -> Optional[float]:
+        if not self._batch:
+            return None
+        return max(0.0, self._batch_started_at + self.batch_max_delay_in_sec - time.monotonic())
+
+    def flush(self):
+        if not self._batch:
+            return
+        batch = self._batch
+        self._batch = []
+        self._send(self._encode(batch, self.wire_format))
+
+    def _send(self, datagram: bytes):
+        self.sock.sendto(datagram, self.server_address)
+
+    def _encode(self, batch: list[GazeSample], wire_format: str) -> bytes:
+        if wire_format == WIRE_FORMAT_BINARY:
+            return self._encode_binary(batch)
+        return self._encode_json(batch)
+
+    def _encode_json(self, batch: list[GazeSample]) -> bytes:
+        now_wall = datetime.now()
+        now_monotonic = time.monotonic()
+        messages = []
+        for sample in batch:
+            # the timestamp is when the sample was captured, not when it is sent
+            captured_at = now_wall - timedelta(seconds=now_monotonic - sample.timestamp)
+            messages.append(
+                {
+                    "x": sample.vector[0],
+                    "y": sample.vector[1],
+                    "timestamp": str(captured_at),
+                    "sequence": sample.sequence,
+                    "confidence": sample.confidence,
+                    "source": sample.source,
+                }
+            )
+        return json.dumps(messages if self.batch_size > 1 else messages[0]).encode()
+
+    @staticmethod
+    def _encode_binary(batch: list[GazeSample]) -> bytes:
+        datagram = bytearray(BINARY_HEADER.size + BINARY_RECORD.size * len(batch))
+        BINARY_HEADER.pack_into(datagram, 0, BINARY_MAGIC, BINARY_VERSION, 0, len(batch))
+        offset = BINARY_HEADER.size
+        for sample in batch:
+            BINARY_RECORD.pack_into(
+                datagram,
+                offset,
+                sample.vector[0],
+                sample.vector[1],
+                int(sample.timestamp * 1_000_000_000),
+                sample.sequence,
+            )
+            offset += BINARY_RECORD.size
+        return bytes(datagram)
+
+
+class UdpBinaryOutputMethod(UdpOutputMethod):
+    """Pushes the vectors as compact binary records over UDP, UDP_BINARY_BATCH_SIZE records per datagram."""
+
+    def __init__(self, root_window, host="127.0.0.1", port=9999):
+        super().__init__(
+            root_window, host, port, wire_format=WIRE_FORMAT_BINARY, batch_size=config.UDP_BINARY_BATCH_SIZE
+        )
@@ -1,8 +1,7 @@
-from tracking_approaches.d_pad_tracking_approach import DPadTrackingApproach
-from tracking_approaches.gaze_on_screen_tracking_approach import \
-    GazeOnScreenTrackingApproach
-from misc import resource_path
 from guis.tkinter.main_menu_window import MainMenuOption
+from misc import LazyClass, resource_path
+
+# the tracking approaches are only imported when they're selected
 
 tracking_approaches: dict[MainMenuOption] = {
     "gaze-on-screen": MainMenuOption(
@@ -10,13 +9,13 @@ tracking_approaches: dict[MainMenuOption] = {
         title="Gaze on Screen",
         description="Take the gaze and map it to the screen directly.",
         icon=resource_path("assets/tracking_approach_gaze_on_screen.png"),
-        clazz=GazeOnScreenTrackingApproach,
+        clazz=LazyClass("tracking_approaches.gaze_on_screen_tracking_approach:GazeOnScreenTrackingApproach"),
     ),
     "d-pad": MainMenuOption(
         key="d-pad",
         title="D-Pad",
         description='Control the "gaze" by looking on a D-Pad.',
         icon=resource_path("assets/tracking_approach_d_pad.png"),
-        clazz=DPadTrackingApproach,
+        clazz=LazyClass("tracking_approaches.d_pad_tracking_approach:DPadTrackingApproach"),
     ),
 }
@@ -0,0 +1,76 @@
+from typing import Optional
+
+import numpy as np
+
+from misc import Vector
+
+
+def compute_perspective_transformation_matrix(src_matrix, dst_matrix):
+    A = []
+    for i in range(4):
+        x, y = src_matrix[i][0], src_matrix[i][1]
+        u, v = dst_matrix[i][0], dst_matrix[i][1]
+        A.append([-x, -y, -1, 0, 0, 0, x * u, y * u, u])
+        A.append([0, 0, 0, -x, -y, -1, x * v, y * v, v])
+    A = np.array(A)
+
+    U, S, Vt = np.linalg.svd(A)
+    H = Vt[-1].reshape(3, 3)
+
+    return H / H[-1, -1]
+
+
+class Homography:
+    """A perspective transformation of two-dimensional vectors.
+
+    A single vector is transformed with plain float arithmetic, which avoids allocating
+    NumPy arrays per vector. Many vectors at once, e.g. of a recorded session, are
+    transformed vectorized with `transform_many`."""
+
+    def __init__(self, matrix):
+        self.matrix = np.array(matrix, dtype=np.float64).reshape(3, 3)
+        (
+            self._h00, self._h01, self._h02,
+            self._h10, self._h11, self._h12,
+            self._h20, self._h21, self._h22,
+        ) = self.matrix.ravel().tolist()
+        # vectors @ _linear + _offset gives the homogeneous coordinates of row vectors
+        self._linear = np.ascontiguousarray(self.matrix[:, :2].T)
+        self._offset = np.ascontiguousarray(self.matrix[:, 2])
+        self._homogeneous = np.empty((0, 3), dtype=np.float64)
+
+    @classmethod
+    def from_points(cls, src_points, dst_points) -> "Homography":
+        """Computes the Homography mapping the four src_points onto the four dst_points."""
+        return cls(compute_perspective_transformation_matrix(src_points, dst_points))
+
+    def transform(self, vector: Vector) -> Optional[Vector]:
+        """Returns None if the vector is mapped to infinity, i.e. it lies on the horizon of the transformation."""
+        x = float(vector[0])
+        y = float(vector[1])
+        w = self._h20 * x + self._h21 * y + self._h22
+        if w == 0:
+            return None
+        return (
+            (self._h00 * x + self._h01 * y + self._h02) / w,
+            (self._h10 * x + self._h11 * y + self._h12) / w,
+        )
+
+    def transform_many(self, vectors: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Transforms an array of shape (N, 2). The result is written into `out` if given.
+        The rows of vectors that `transform` returns None for, because they are mapped to infinity, are NaN.
+        The intermediate buffer is kept and reused for subsequent calls of the same or a smaller size."""
+        vectors = np.asarray(vectors, dtype=np.float64)
+        n = vectors.shape[0]
+        if self._homogeneous.shape[0] < n:
+            self._homogeneous = np.empty((n, 3), dtype=np.float64)
+        homogeneous = self._homogeneous[:n]
+        np.matmul(vectors, self._linear, out=homogeneous)
+        homogeneous += self._offset
+        if out is None:
+            out = np.empty((n, 2), dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.divide(homogeneous[:, :2], homogeneous[:, 2:], out=out)
+        if not homogeneous[:, 2].all():
+            out[homogeneous[:, 2] == 0] = np.nan
+        return out
@@ -3,6 +3,7 @@ from misc import Vector
 from typing import Optional
 
 from calibration import CalibrationInstructions, CalibrationResult
+from gaze_sample import GazeSample
 from mouse_movement import MouseMovement
 
 
@@ -38,3 +39,11 @@ class TrackingApproach(ABC):
         """Based on a vector, a MouseMovement might be translated. For example, when looking at
         a certain position, the mouse shall move to a certain position on the screen."""
         pass
+
+    def get_next_mouse_movement_for_sample(self, sample: GazeSample) -> Optional[MouseMovement]:
+        """Like `get_next_mouse_movement`, but for a GazeSample. The sample is attached to the
+        MouseMovement, so its timestamp and sequence are kept until the OutputMethod."""
+        mouse_movement = self.get_next_mouse_movement(sample.vector)
+        if mouse_movement is not None:
+            mouse_movement.sample = sample
+        return mouse_movement